@@ -1,9 +1,16 @@
+import hashlib
+import json
 import os
 import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from transformers import AutoTokenizer, AutoModelForCausalLM
-from huggingface_hub import InferenceClient
+
+# torch, transformers и huggingface_hub импортируются при первом обращении
+# (или в фоне после показа окна, см. main.py) — на старт приложения они не влияют
 
 BASE_DIR = Path(__file__).parent
 
@@ -19,53 +26,369 @@ HF_MODELS = {
 
 HF_TOKEN = os.getenv("HF_TOKEN", "YOUR_HF_TOKEN")
 
-# 🔹 Словарь для ленивой загрузки моделей
-_models = {}
+# 🔹 Кеш советов
+ADVICE_CACHE_FILE = BASE_DIR / "advice_cache.json"
+ADVICE_CACHE_MEMORY_SIZE = 128  # записей в памяти
+ADVICE_CACHE_DISK_SIZE = 2000  # записей в файле
+ADVICE_CACHE_TTL = 7 * 24 * 3600  # секунд
+
+# 🔹 Резидентные локальные модели
+AI_MEMORY_BUDGET_MB = 1500  # суммарный размер весов загруженных моделей
+AI_IDLE_UNLOAD_SEC = 15 * 60  # выгружать модель, если она не использовалась столько
+
+# 🔹 Генерация на CPU
+# "default" — веса fp32 как есть; "fast" — динамическое int8-квантование линейных слоёв
+AI_CPU_MODES = ("default", "fast")
+AI_MAX_NEW_TOKENS = 80  # длина совета без учёта промпта
+AI_BATCH_SIZE = 8  # промптов за один вызов generate при предрасчёте советов
+
+# 🔹 Выбор источника советов
+AI_BACKEND_ORDERS = ("local_first", "remote_first", "static_only")
+AI_REMOTE_TIMEOUT = 15  # секунд на запрос к HF API
+AI_LOCAL_MAX_TIME = 20  # секунд на локальную генерацию (max_time в generate)
+AI_BREAKER_FAILURES = 3  # столько ошибок подряд — и API временно не используется
+AI_BREAKER_COOLDOWN = 5 * 60  # секунд
+
+
+def _cpu_threads():
+    """Число потоков torch по умолчанию: физические ядра (без гиперпоточности)."""
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def _conv1d_to_linear(module):
+    """Заменяет Conv1D из GPT-2 на nn.Linear (на месте).
+
+    Слои внимания и MLP в GPT-2 (rugpt3small, distilgpt2) — это transformers
+    Conv1D, который quantize_dynamic не трогает; после замены их можно квантовать.
+    """
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    for name, child in module.named_children():
+        if isinstance(child, Conv1D):
+            n_in, n_out = child.weight.shape
+            linear = torch.nn.Linear(n_in, n_out)
+            linear.weight.data = child.weight.data.t().contiguous()
+            linear.bias.data = child.bias.data
+            setattr(module, name, linear)
+        else:
+            _conv1d_to_linear(child)
+    return module
+
+
+def _optimize_for_cpu(model):
+    """int8-веса для линейных слоёв: модель меньше в ~3 раза и быстрее на CPU."""
+    import torch
+
+    _conv1d_to_linear(model)
+    return torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
 
+def local_model_installed(lang):
+    """Лежит ли локальная модель для языка на диске (без импорта torch)."""
+    return os.path.isdir(RU_LOCAL if lang == "ru" else EN_LOCAL)
 
-def _load_local_model(lang):
-    """Загружает локальную модель при необходимости"""
+
+def _load_local_model(lang, cpu_mode="default"):
+    """Загружает локальную модель с диска (без кеширования)"""
     path = RU_LOCAL if lang == "ru" else EN_LOCAL
     if not os.path.isdir(path):
         return None, None
     try:
+        from transformers import AutoTokenizer, AutoModelForCausalLM
+
         print(f"✅ Загружаем локальную модель из {path}")
         tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
         model = AutoModelForCausalLM.from_pretrained(path, local_files_only=True)
-        _models[lang] = (tokenizer, model)
+        model.eval()
+        if cpu_mode == "fast":
+            model = _optimize_for_cpu(model)
         return tokenizer, model
     except Exception as e:
         print(f"⚠️ Ошибка загрузки локальной модели: {e}")
         return None, None
 
 
-def _generate_local(prompt, lang="ru"):
-    """Генерация через локальную модель (fallback)"""
-    tokenizer, model = _models.get(lang, (None, None))
-    if tokenizer is None or model is None:
-        tokenizer, model = _load_local_model(lang)
-        if tokenizer is None:
-            return None
+def _model_size(model):
+    """Размер весов в байтах (с упакованными int8-весами квантованных слоёв)."""
+    import torch
+
+    seen = set()
+    size = 0
+    for value in model.state_dict().values():
+        for t in value if isinstance(value, tuple) else (value,):
+            # связанные веса (эмбеддинги и lm_head) считаем один раз
+            if not torch.is_tensor(t) or t.data_ptr() in seen:
+                continue
+            seen.add(t.data_ptr())
+            size += t.numel() * t.element_size()
+    return size
+
+
+class AdviceEngine:
+    """Держит загруженными локальные модели (по одной на язык) и клиентов HF API.
+
+    Модели можно заранее загрузить в фоне (preload). Если суммарный размер
+    превышает бюджет, выгружается давно не использованная модель; простаивающие
+    дольше idle_timeout выгружаются фоновым таймером.
+    """
+
+    def __init__(
+        self, memory_budget_mb=AI_MEMORY_BUDGET_MB, idle_timeout=AI_IDLE_UNLOAD_SEC
+    ):
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.idle_timeout = idle_timeout
+        self.cpu_mode = "default"
+        self.threads = None  # число потоков torch; None — не трогать
+        self._models = {}  # lang -> (tokenizer, model, размер в байтах)
+        self._last_used = {}
+        self._in_use = {}
+        self._missing = set()  # языки, для которых модели нет на диске
+        self._clients = {}
+        self._lock = threading.RLock()
+        self._load_locks = {"ru": threading.Lock(), "en": threading.Lock()}
+        # модель и токенизатор одного языка не рассчитаны на два generate сразу
+        # (и пачки меняют настройки дополнения токенизатора) — use по очереди
+        self._use_locks = {"ru": threading.Lock(), "en": threading.Lock()}
+        self._reaper = None
+
+    def configure(
+        self, memory_budget_mb=None, idle_timeout=None, cpu_mode=None, threads=None
+    ):
+        with self._lock:
+            if memory_budget_mb is not None:
+                self.memory_budget = memory_budget_mb * 1024 * 1024
+            if idle_timeout is not None:
+                self.idle_timeout = idle_timeout
+            if cpu_mode in AI_CPU_MODES and cpu_mode != self.cpu_mode:
+                self.cpu_mode = cpu_mode
+                # модели в старом режиме перезагрузятся при следующем обращении
+                for lang in list(self._models):
+                    if not self._in_use.get(lang):
+                        self._unload(lang)
+            if threads or cpu_mode == "fast":
+                # применяется при загрузке модели, чтобы не импортировать torch заранее
+                self.threads = threads or _cpu_threads()
+
+    def _ensure_loaded(self, lang):
+        with self._lock:
+            if lang in self._models or lang in self._missing:
+                return
+        # грузим вне общего замка, чтобы не блокировать другой язык
+        with self._load_locks.setdefault(lang, threading.Lock()):
+            with self._lock:
+                if lang in self._models:
+                    return
+                cpu_mode, threads = self.cpu_mode, self.threads
+            if threads:
+                import torch
+
+                torch.set_num_threads(threads)
+            tokenizer, model = _load_local_model(lang, cpu_mode)
+            with self._lock:
+                if tokenizer is None:
+                    self._missing.add(lang)
+                    return
+                size = _model_size(model)
+                self._evict_for(size, keep=lang)
+                self._models[lang] = (tokenizer, model, size)
+                self._last_used[lang] = time.monotonic()
+        self._schedule_reaper()
+
+    def is_missing(self, lang) -> bool:
+        """True, если загрузка уже показала, что модели языка нет на диске."""
+        with self._lock:
+            return lang in self._missing
+
+    def _evict_for(self, size, keep=None):
+        """Освобождает место под модель размером size (по принципу LRU)."""
+        used = sum(m[2] for m in self._models.values())
+        for lang in sorted(self._models, key=lambda k: self._last_used.get(k, 0)):
+            if used + size <= self.memory_budget:
+                break
+            if lang == keep or self._in_use.get(lang):
+                continue
+            used -= self._models[lang][2]
+            self._unload(lang)
+
+    def _unload(self, lang):
+        self._models.pop(lang, None)
+        self._last_used.pop(lang, None)
+        print(f"♻️ Выгружена локальная модель ({lang})")
+
+    @contextmanager
+    def use(self, lang):
+        """Даёт (tokenizer, model) на время генерации или (None, None).
 
-    inputs = tokenizer(prompt, return_tensors="pt")
-    output = model.generate(
-        **inputs,
-        max_length=200,
+        Генерации на одном языке идут по очереди: второй use ждёт первого.
+        """
+        with self._lock:
+            use_lock = self._use_locks.setdefault(lang, threading.Lock())
+        with use_lock:
+            self._ensure_loaded(lang)
+            with self._lock:
+                entry = self._models.get(lang)
+                if entry:
+                    self._in_use[lang] = self._in_use.get(lang, 0) + 1
+                    self._last_used[lang] = time.monotonic()
+            if not entry:
+                yield None, None
+                return
+            try:
+                yield entry[0], entry[1]
+            finally:
+                with self._lock:
+                    self._in_use[lang] -= 1
+                    self._last_used[lang] = time.monotonic()
+
+    def preload(self, langs=("ru", "en")):
+        """Загружает модели в фоновом потоке; возвращает поток."""
+        thread = threading.Thread(
+            target=lambda: [self._ensure_loaded(lang) for lang in langs],
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def unload_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            for lang in list(self._models):
+                idle = now - self._last_used.get(lang, now)
+                if idle >= self.idle_timeout and not self._in_use.get(lang):
+                    self._unload(lang)
+            has_models = bool(self._models)
+            self._reaper = None
+        if has_models:
+            self._schedule_reaper()
+
+    def _schedule_reaper(self):
+        with self._lock:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Timer(self.idle_timeout / 2, self.unload_idle)
+            self._reaper.daemon = True
+            self._reaper.start()
+
+    def client_for(self, model_name, timeout=None):
+        """Один InferenceClient (и его HTTP-сессия) на модель."""
+        with self._lock:
+            client = self._clients.get((model_name, timeout))
+            if client is None:
+                from huggingface_hub import InferenceClient
+
+                client = InferenceClient(
+                    model=model_name, token=HF_TOKEN, timeout=timeout
+                )
+                self._clients[(model_name, timeout)] = client
+            return client
+
+
+engine = AdviceEngine()
+
+
+def _stopping_criteria(should_stop=None):
+    """StoppingCriteriaList, прерывающий generate, когда запрос совета устарел."""
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class StopRequested(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return bool(should_stop())
+
+    return StoppingCriteriaList([StopRequested()] if should_stop else [])
+
+
+def run_generate(tokenizer, model, inputs, **kwargs):
+    """model.generate с параметрами приложения; без графа градиентов."""
+    import torch
+
+    params = dict(
+        max_new_tokens=AI_MAX_NEW_TOKENS,
         temperature=0.8,
         top_p=0.9,
         do_sample=True,
         pad_token_id=tokenizer.eos_token_id,
     )
-    text = tokenizer.decode(output[0], skip_special_tokens=True)
-    return text.replace(prompt, "").strip()
+    params.update(kwargs)
+    with torch.inference_mode():
+        return model.generate(**inputs, **params)
+
 
+def _collect_stream(pieces, on_partial=None, should_stop=None):
+    """Склеивает поток кусков текста, сообщая о накопленном тексте после каждого."""
+    text = ""
+    for piece in pieces:
+        if not piece:
+            continue
+        text += piece
+        if on_partial is not None:
+            on_partial(text.strip())
+        if should_stop is not None and should_stop():
+            break
+    return text
 
-def _generate_hf(prompt, lang="ru"):
-    """Генерация текста через Hugging Face API"""
+
+def _generate_local(
+    prompt, lang="ru", should_stop=None, on_partial=None, max_time=None
+):
+    """Генерация через локальную модель (fallback).
+
+    Если передан on_partial, токены отдаются по мере генерации: generate идёт
+    в отдельном потоке и пишет в TextIteratorStreamer.
+    """
+    stopping = _stopping_criteria(should_stop)
+
+    with engine.use(lang) as (tokenizer, model):
+        if tokenizer is None:
+            return None
+        inputs = tokenizer(prompt, return_tensors="pt")
+        if on_partial is None:
+            output = run_generate(
+                tokenizer,
+                model,
+                inputs,
+                stopping_criteria=stopping,
+                max_time=max_time,
+            )
+            text = tokenizer.decode(output[0], skip_special_tokens=True)
+            return text.replace(prompt, "").strip()
+
+        from transformers import TextIteratorStreamer
+
+        streamer = TextIteratorStreamer(
+            tokenizer, skip_prompt=True, skip_special_tokens=True
+        )
+
+        def run():
+            try:
+                run_generate(
+                    tokenizer,
+                    model,
+                    inputs,
+                    streamer=streamer,
+                    stopping_criteria=stopping,
+                    max_time=max_time,
+                )
+            except Exception as e:
+                print(f"⚠️ Ошибка локальной генерации: {e}")
+                streamer.end()  # иначе чтение потока ждало бы вечно
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        # поток дочитываем до конца: generate завершится сам (или по should_stop)
+        text = _collect_stream(streamer, on_partial)
+        thread.join()
+    return text.strip()
+
+
+def _generate_hf(prompt, lang="ru", should_stop=None, on_partial=None, timeout=None):
+    """Генерация текста через Hugging Face API (потоково, если передан on_partial)"""
     model_name = HF_MODELS["ru"] if lang == "ru" else HF_MODELS["en"]
     print(f"🌐 Генерация через Hugging Face API ({model_name})...")
 
-    client = InferenceClient(model=model_name, token=HF_TOKEN)
+    client = engine.client_for(model_name, timeout)
 
     try:
         # 🧠 Некоторые модели (например Mistral) работают только в режиме "conversational"
@@ -77,6 +400,12 @@ def _generate_hf(prompt, lang="ru"):
                 },
                 {"role": "user", "content": prompt},
             ]
+            if on_partial is not None:
+                chunks = client.chat_completion(
+                    messages, max_tokens=250, temperature=0.7, stream=True
+                )
+                pieces = (c.choices[0].delta.content for c in chunks if c.choices)
+                return _collect_stream(pieces, on_partial, should_stop).strip()
             response = client.chat_completion(messages, max_tokens=250, temperature=0.7)
             return response.choices[0].message["content"].strip()
         else:
@@ -87,33 +416,218 @@ def _generate_hf(prompt, lang="ru"):
                 temperature=0.7,
                 top_p=0.9,
                 repetition_penalty=1.1,
+                stream=on_partial is not None,
             )
+            if on_partial is not None:
+                return _collect_stream(response, on_partial, should_stop).strip()
             return response.strip()
     except Exception as e:
         print(f"⚠️ Ошибка Hugging Face API: {e}")
         return None
 
 
-def get_task_advice(task, lang="ru"):
-    """Генерация совета по тайм-менеджменту"""
-    title = getattr(task, "title", "")
-    desc = getattr(task, "description", "")
-    allocated = getattr(task, "allocated_time", 0)
-    deadline = getattr(task, "deadline", None)
-    pomo_work = getattr(task, "pomodoro_work", 25)
-    pomo_break = getattr(task, "pomodoro_break", 5)
+def remote_configured():
+    """Есть ли настоящий токен HF (а не заглушка по умолчанию)."""
+    return bool(HF_TOKEN) and HF_TOKEN != "YOUR_HF_TOKEN"
 
-    now = datetime.now()
-    days_left = None
-    if deadline:
-        try:
-            deadline_date = deadline.date() if hasattr(deadline, "date") else deadline
-            days_left = (deadline_date - now.date()).days
-        except Exception:
-            days_left = None
+
+class BackendHealth:
+    """Статистика одного источника советов."""
+
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_latency = None  # секунд
+        self.last_error = None
+        self.open_until = 0.0  # до этого момента (monotonic) источник пропускается
+
+    def as_dict(self):
+        return {
+            "successes": self.successes,
+            "failures": self.failures,
+            "last_latency": self.last_latency,
+            "last_error": self.last_error,
+            "cooldown_left": max(0.0, self.open_until - time.monotonic()),
+        }
+
+
+class AdviceRouter:
+    """Выбирает, откуда брать совет: локальная модель, HF API или статический.
+
+    Порядок задаётся настройкой (local_first / remote_first / static_only).
+    API пропускается без токена, а после failure_threshold ошибок подряд —
+    ещё и на cooldown секунд (circuit breaker).
+    """
+
+    def __init__(
+        self,
+        order="local_first",
+        remote_timeout=AI_REMOTE_TIMEOUT,
+        local_max_time=AI_LOCAL_MAX_TIME,
+        failure_threshold=AI_BREAKER_FAILURES,
+        cooldown=AI_BREAKER_COOLDOWN,
+    ):
+        self.order = order
+        self.remote_timeout = remote_timeout
+        self.local_max_time = local_max_time
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.health = {"local": BackendHealth(), "remote": BackendHealth()}
+        self.active = None  # источник последнего удачного совета
+        self._lock = threading.Lock()
+
+    def configure(self, order=None, remote_timeout=None, local_max_time=None):
+        with self._lock:
+            if order in AI_BACKEND_ORDERS:
+                self.order = order
+            if remote_timeout is not None:
+                self.remote_timeout = remote_timeout
+            if local_max_time is not None:
+                self.local_max_time = local_max_time
+
+    def backends(self):
+        if self.order == "static_only":
+            return []
+        if self.order == "remote_first":
+            return ["remote", "local"]
+        return ["local", "remote"]
+
+    def available(self, name, lang="ru"):
+        if name == "remote":
+            if not remote_configured():
+                return False
+            return time.monotonic() >= self.health["remote"].open_until
+        return not engine.is_missing(lang)
+
+    def _record(self, name, text, started, error=None):
+        h = self.health[name]
+        with self._lock:
+            h.last_latency = time.monotonic() - started
+            if text:
+                h.successes += 1
+                h.consecutive_failures = 0
+                h.last_error = None
+                self.active = name
+                return
+            h.failures += 1
+            h.consecutive_failures += 1
+            h.last_error = error or "empty response"
+            if name == "remote" and h.consecutive_failures >= self.failure_threshold:
+                h.open_until = time.monotonic() + self.cooldown
+                h.consecutive_failures = 0
+                print(f"⏸️ HF API отключён на {self.cooldown} с после ошибок подряд")
+
+    def generate(self, prompt, lang="ru", should_stop=None, on_partial=None):
+        """Текст совета от первого сработавшего источника или None."""
+        should_stop = should_stop or (lambda: False)
+        for name in self.backends():
+            if should_stop():
+                return None
+            if not self.available(name, lang):
+                continue
+            started = time.monotonic()
+            error = None
+            try:
+                if name == "remote":
+                    text = _generate_hf(
+                        prompt, lang, should_stop, on_partial, self.remote_timeout
+                    )
+                else:
+                    text = _generate_local(
+                        prompt, lang, should_stop, on_partial, self.local_max_time
+                    )
+                    if text is None and engine.is_missing(lang):
+                        continue  # модели нет на диске — это не сбой
+            except Exception as e:
+                print(f"⚠️ Ошибка источника советов ({name}): {e}")
+                text, error = None, str(e)
+            if should_stop():
+                return None
+            self._record(name, text, started, error)
+            if text:
+                return text
+        return None
+
+    def stats(self):
+        """Состояние источников для страницы настроек."""
+        with self._lock:
+            result = {"order": self.order, "active": self.active}
+            for name, h in self.health.items():
+                info = h.as_dict()
+                if name == "remote" and not remote_configured():
+                    info["state"] = "disabled"
+                elif info["cooldown_left"] > 0:
+                    info["state"] = "cooldown"
+                elif name == "local" and all(
+                    engine.is_missing(lang) for lang in ("ru", "en")
+                ):
+                    info["state"] = "missing"
+                else:
+                    info["state"] = "ok"
+                result[name] = info
+            return result
+
+
+router = AdviceRouter()
+
+
+def _days_left(deadline):
+    if not deadline:
+        return None
+    try:
+        deadline_date = deadline.date() if hasattr(deadline, "date") else deadline
+        return (deadline_date - datetime.now().date()).days
+    except Exception:
+        return None
+
+
+def _deadline_bucket(days_left):
+    """Грубая оценка срочности для ключа кеша: совет не меняется каждый день."""
+    if days_left is None:
+        return "none"
+    if days_left < 0:
+        return "overdue"
+    for limit in (0, 1, 3, 7, 14, 30):
+        if days_left <= limit:
+            return f"<={limit}"
+    return ">30"
+
+
+def _task_inputs(task):
+    return {
+        "title": getattr(task, "title", ""),
+        "desc": getattr(task, "description", ""),
+        "allocated": getattr(task, "time_allocated", 0),
+        "days_left": _days_left(getattr(task, "deadline", None)),
+        "pomo_work": getattr(task, "pomodoro_work", 25),
+        "pomo_break": getattr(task, "pomodoro_break", 5),
+        "pomo_long": getattr(task, "pomodoro_long", 15),
+        "pomo_cycles": getattr(task, "pomodoro_cycles", 4),
+    }
+
+
+def advice_cache_key(task, lang="ru"):
+    """Хеш входных данных промпта (дедлайн — с точностью до корзины срочности)."""
+    inputs = _task_inputs(task)
+    inputs["days_left"] = _deadline_bucket(inputs["days_left"])
+    inputs["lang"] = lang
+    raw = json.dumps(inputs, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def build_prompt(task, lang="ru"):
+    """Промпт для модели по данным задачи."""
+    inputs = _task_inputs(task)
+    title = inputs["title"]
+    desc = inputs["desc"]
+    allocated = inputs["allocated"]
+    days_left = inputs["days_left"]
+    pomo_work = inputs["pomo_work"]
+    pomo_break = inputs["pomo_break"]
 
     if lang == "ru":
-        prompt = (
+        return (
             "Ты — профессиональный ассистент по тайм-менеджменту. "
             "Проанализируй задачу и дай конкретный, краткий совет для повышения эффективности.\n\n"
             f"Задача: {title}\n"
@@ -123,41 +637,215 @@ def get_task_advice(task, lang="ru"):
             f"Pomodoro: {pomo_work}/{pomo_break} мин.\n"
             "Совет:"
         )
-    else:
-        prompt = (
-            "You are an expert time management assistant. "
-            "Analyze the task and give a concise, practical productivity tip.\n\n"
-            f"Task: {title}\n"
-            f"Description: {desc}\n"
-            f"Allocated time: {allocated} min.\n"
-            f"Deadline: {days_left if days_left is not None else 'not set'} days.\n"
-            f"Pomodoro: {pomo_work}/{pomo_break} min.\n"
-            "Tip:"
-        )
+    return (
+        "You are an expert time management assistant. "
+        "Analyze the task and give a concise, practical productivity tip.\n\n"
+        f"Task: {title}\n"
+        f"Description: {desc}\n"
+        f"Allocated time: {allocated} min.\n"
+        f"Deadline: {days_left if days_left is not None else 'not set'} days.\n"
+        f"Pomodoro: {pomo_work}/{pomo_break} min.\n"
+        "Tip:"
+    )
 
-    # 1️⃣ Пытаемся через API
-    try:
-        text = _generate_hf(prompt, lang)
-    except Exception as e:
-        print(f"⚠️ Ошибка API Hugging Face: {e}")
-        text = None
 
-    # 2️⃣ Если не сработало — fallback на локальную модель
-    if not text:
-        text = _generate_local(prompt, lang)
+def _static_advice(lang="ru"):
+    backup_ru = [
+        "Разбей задачу на конкретные шаги и начни с самого простого.",
+        "Выдели приоритеты и работай в коротких фокус-сессиях.",
+        "Поставь таймер и избегай отвлекающих факторов.",
+    ]
+    backup_en = [
+        "Break the task into specific steps and start with the simplest one.",
+        "Set clear priorities and work in focused short sessions.",
+        "Use a timer and minimize distractions.",
+    ]
+    return random.choice(backup_ru if lang == "ru" else backup_en)
+
+
+class AdviceCache:
+    """Кеш советов: LRU в памяти + JSON-файл на диске с лимитом размера и TTL."""
+
+    def __init__(
+        self,
+        path=ADVICE_CACHE_FILE,
+        memory_size=ADVICE_CACHE_MEMORY_SIZE,
+        disk_size=ADVICE_CACHE_DISK_SIZE,
+        ttl=ADVICE_CACHE_TTL,
+    ):
+        self.path = Path(path)
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.ttl = ttl
+        self._memory = OrderedDict()  # key -> (время записи, текст)
+        self._disk = None  # читается с диска при первом обращении
+        self._lock = threading.Lock()
+
+    def _expired(self, entry, now):
+        return now - entry[0] > self.ttl
+
+    def _load_disk(self):
+        if self._disk is not None:
+            return
+        self._disk = OrderedDict()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        # в файле записи лежат от старых к новым
+        for key, (stamp, text) in data.items():
+            if not self._expired((stamp, text), now):
+                self._disk[key] = (stamp, text)
+
+    def _save_disk(self):
+        while len(self._disk) > self.disk_size:
+            self._disk.popitem(last=False)
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._disk, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ Не удалось сохранить кеш советов: {e}")
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                self._load_disk()
+                entry = self._disk.get(key)
+            if entry is None or self._expired(entry, now):
+                self._memory.pop(key, None)
+                return None
+            self._remember(key, entry)
+            return entry[1]
+
+    def put(self, key, text):
+        self.put_many([(key, text)])
+
+    def put_many(self, items):
+        """Добавляет пары (ключ, текст) с одной записью файла на диск."""
+        now = time.time()
+        with self._lock:
+            self._load_disk()
+            for key, text in items:
+                entry = (now, text)
+                self._remember(key, entry)
+                self._disk.pop(key, None)
+                self._disk[key] = entry
+            self._save_disk()
+
+
+advice_cache = AdviceCache()
+
 
-    # 3️⃣ Если совсем ничего — статический совет
+def get_task_advice(task, lang="ru", should_stop=None, on_partial=None):
+    """Генерация совета по тайм-менеджменту.
+
+    Сначала смотрит в кеш (по хешу данных задачи), затем генерирует.
+    should_stop — необязательная функция без аргументов; если она вернула True,
+    генерация прекращается и возвращается None (запрос устарел).
+    on_partial — необязательная функция, получающая накопленный текст совета
+    по мере генерации (при смене источника текст начинается заново).
+    """
+    should_stop = should_stop or (lambda: False)
+    key = advice_cache_key(task, lang)
+    cached = advice_cache.get(key)
+    if cached:
+        return cached
+
+    prompt = build_prompt(task, lang)
+
+    if should_stop():
+        return None
+
+    # 1️⃣ Локальная модель и/или API — в порядке из настроек
+    text = router.generate(prompt, lang, should_stop, on_partial)
+    if should_stop():
+        return None
+
+    # 2️⃣ Если совсем ничего — статический совет (его не кешируем)
     if not text or len(text) < 10:
-        backup_ru = [
-            "Разбей задачу на конкретные шаги и начни с самого простого.",
-            "Выдели приоритеты и работай в коротких фокус-сессиях.",
-            "Поставь таймер и избегай отвлекающих факторов.",
-        ]
-        backup_en = [
-            "Break the task into specific steps and start with the simplest one.",
-            "Set clear priorities and work in focused short sessions.",
-            "Use a timer and minimize distractions.",
-        ]
-        text = random.choice(backup_ru if lang == "ru" else backup_en)
+        return _static_advice(lang)
 
-    return text.strip()
+    text = text.strip()
+    advice_cache.put(key, text)
+    return text
+
+
+def precompute_advice(tasks, lang="ru", batch_size=AI_BATCH_SIZE, should_stop=None):
+    """Генерирует советы для всех открытых задач пачками и кладёт их в кеш.
+
+    Промпты без готового совета в кеше дополняются слева до общей длины и
+    идут в model.generate по batch_size штук. Возвращает число новых советов.
+    """
+    should_stop = should_stop or (lambda: False)
+    if router.order == "static_only":
+        return 0
+    pending = {}  # ключ кеша -> промпт (одинаковые задачи считаем один раз)
+    for task in tasks:
+        if getattr(task, "is_completed", False):
+            continue
+        key = advice_cache_key(task, lang)
+        if key not in pending and advice_cache.get(key) is None:
+            pending[key] = build_prompt(task, lang)
+    if not pending:
+        return 0
+
+    stopping = _stopping_criteria(should_stop)
+    items = list(pending.items())
+    done = 0
+    for i in range(0, len(items), batch_size):
+        if should_stop():
+            break
+        batch = items[i : i + batch_size]
+        # модель берём на одну пачку: одиночный совет (AdviceWorker) ждёт
+        # не весь прогон, а только текущую пачку
+        with engine.use(lang) as (tokenizer, model):
+            if tokenizer is None:
+                break
+            # GPT-2 без pad-токена; дополнение слева, чтобы генерация шла сразу
+            # за промптом. Токенизатор общий (кешируется движком) — после пачки
+            # возвращаем прежние настройки, иначе изменится разбор одиночных промптов
+            padding_side, pad_token = tokenizer.padding_side, tokenizer.pad_token
+            tokenizer.padding_side = "left"
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+            try:
+                inputs = tokenizer(
+                    [prompt for _, prompt in batch], return_tensors="pt", padding=True
+                )
+                output = run_generate(
+                    tokenizer,
+                    model,
+                    inputs,
+                    pad_token_id=tokenizer.pad_token_id,
+                    stopping_criteria=stopping,
+                )
+                prompt_len = inputs["input_ids"].shape[1]
+                texts = tokenizer.batch_decode(
+                    output[:, prompt_len:], skip_special_tokens=True
+                )
+            finally:
+                tokenizer.padding_side = padding_side
+                tokenizer.pad_token = pad_token
+        if should_stop():
+            break
+        results = [
+            (key, text.strip())
+            for (key, _), text in zip(batch, texts)
+            if len(text.strip()) >= 10
+        ]
+        if results:
+            advice_cache.put_many(results)
+            done += len(results)
+    return done
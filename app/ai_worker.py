@@ -0,0 +1,79 @@
+# app/ai_worker.py
+import threading
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+from .ai_assistant import get_task_advice, precompute_advice
+
+
+class AdviceSignals(QObject):
+    # id запроса, текст совета
+    finished = pyqtSignal(int, str)
+    # id запроса, уже сгенерированная часть совета
+    partial = pyqtSignal(int, str)
+
+
+class PrecomputeSignals(QObject):
+    # сколько советов сгенерировано
+    finished = pyqtSignal(int)
+
+
+class AdviceWorker(QRunnable):
+    """Генерирует совет для задачи в пуле потоков, не блокируя интерфейс."""
+
+    def __init__(self, request_id, task, lang="ru"):
+        super().__init__()
+        self.request_id = request_id
+        self.task = task
+        self.lang = lang
+        self.cancelled = threading.Event()
+        self.signals = AdviceSignals()
+
+    def cancel(self):
+        """Помечает запрос устаревшим: генерация прервётся, результат не придёт."""
+        self.cancelled.set()
+
+    def _emit_partial(self, text):
+        if not self.cancelled.is_set():
+            self.signals.partial.emit(self.request_id, text)
+
+    def run(self):
+        if self.cancelled.is_set():
+            return
+        try:
+            advice = get_task_advice(
+                self.task,
+                lang=self.lang,
+                should_stop=self.cancelled.is_set,
+                on_partial=self._emit_partial,
+            )
+        except Exception as e:
+            print(f"⚠️ Ошибка генерации совета: {e}")
+            advice = ""
+        if not self.cancelled.is_set():
+            self.signals.finished.emit(self.request_id, advice or "")
+
+
+class PrecomputeWorker(QRunnable):
+    """Генерирует советы для всех открытых задач пачками (в кеш советов)."""
+
+    def __init__(self, tasks, lang="ru"):
+        super().__init__()
+        self.tasks = list(tasks)
+        self.lang = lang
+        self.cancelled = threading.Event()
+        self.signals = PrecomputeSignals()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        if self.cancelled.is_set():
+            return
+        try:
+            count = precompute_advice(
+                self.tasks, lang=self.lang, should_stop=self.cancelled.is_set
+            )
+        except Exception as e:
+            print(f"⚠️ Ошибка пакетной генерации советов: {e}")
+            count = 0
+        if not self.cancelled.is_set():
+            self.signals.finished.emit(count)
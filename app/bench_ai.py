@@ -0,0 +1,100 @@
+# app/bench_ai.py
+"""Замер локальной генерации советов: токены/с и пиковая память процесса.
+
+Запуск из корня проекта:
+    python -m app.bench_ai                 # оба режима, каждый в своём процессе
+    python -m app.bench_ai --mode fast --runs 5 --lang en
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+def peak_rss_mb():
+    """Пиковый RSS текущего процесса в МБ (None, если узнать нечем)."""
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux отдаёт килобайты, macOS — байты
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil  # Windows; необязательная зависимость
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().peak_wset / 1024 / 1024
+
+
+def bench(mode, lang, runs, threads=None):
+    import torch
+    from .ai_assistant import _load_local_model, build_prompt, run_generate
+    from .models import Task
+
+    if mode == "fast" or threads:
+        from .ai_assistant import _cpu_threads
+
+        torch.set_num_threads(threads or _cpu_threads())
+
+    t0 = time.perf_counter()
+    tokenizer, model = _load_local_model(lang, mode)
+    load_s = time.perf_counter() - t0
+    if tokenizer is None:
+        print(f"❌ Нет локальной модели для языка {lang}")
+        return
+
+    task = Task(
+        None,
+        title="Диплом" if lang == "ru" else "Thesis",
+        description="Написать вторую главу" if lang == "ru" else "Write chapter two",
+        time_allocated=120,
+    )
+    inputs = tokenizer(build_prompt(task, lang), return_tensors="pt")
+    prompt_len = inputs["input_ids"].shape[1]
+
+    torch.manual_seed(0)
+    run_generate(tokenizer, model, inputs, max_new_tokens=8)  # прогрев
+
+    tokens = 0
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        output = run_generate(tokenizer, model, inputs)
+        tokens += output.shape[1] - prompt_len
+    gen_s = time.perf_counter() - t0
+
+    peak = peak_rss_mb()
+    rss = f"{peak:.0f} МБ" if peak is not None else "n/a"
+    print(
+        f"{mode:>8}: загрузка {load_s:.1f} с, "
+        f"{tokens / gen_s:.1f} ток/с ({tokens} ток. за {gen_s:.1f} с), "
+        f"потоков {torch.get_num_threads()}, пик RSS {rss}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["default", "fast", "both"], default="both")
+    parser.add_argument("--lang", choices=["ru", "en"], default="ru")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.mode != "both":
+        bench(args.mode, args.lang, args.runs, args.threads)
+        return
+
+    # каждый режим в отдельном процессе, чтобы пиковая память не смешивалась
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for mode in ("default", "fast"):
+        cmd = [sys.executable, "-m", "app.bench_ai", "--mode", mode]
+        cmd += ["--lang", args.lang, "--runs", str(args.runs)]
+        if args.threads:
+            cmd += ["--threads", str(args.threads)]
+        subprocess.run(cmd, cwd=root, check=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# app/bench_models.py
+"""Память и скорость разбора задач (Task.from_dict / to_dict) на большом файле.
+
+Запуск из корня проекта:
+    python -m app.bench_models                    # 2000 задач, 200 000 сессий
+    python -m app.bench_models --tasks 500 --sessions 50000 --runs 5
+"""
+import argparse
+import time
+import tracemalloc
+from .bench_storage import make_tasks
+from .models import Task
+
+
+def best_of(runs, func):
+    best = None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=200_000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    # уже разобранный JSON: меряем только построение моделей
+    items = [t.to_dict() for t in make_tasks(args.tasks, args.sessions)]
+    headers = [dict(item, sessions=[]) for item in items]
+    print(f"{args.tasks} задач, {args.sessions} сессий; время — лучшее из {args.runs}")
+
+    tracemalloc.start()
+    loaded = [Task.from_dict(item) for item in items]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"память моделей: {current / 1024 / 1024:6.1f} МБ "
+        f"({current / max(1, args.sessions):.0f} байт на сессию с задачами)"
+    )
+
+    tracemalloc.start()
+    bare = [Task.from_dict(item) for item in headers]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"задача без сессий: {current / max(1, len(bare)):.0f} байт")
+
+    parse_s = best_of(args.runs, lambda: [Task.from_dict(item) for item in items])
+    header_s = best_of(args.runs, lambda: [Task.from_dict(item) for item in headers])
+    dump_s = best_of(args.runs, lambda: [t.to_dict() for t in loaded])
+    print(
+        f"from_dict: {parse_s * 1000:6.0f} мс "
+        f"({args.sessions / parse_s / 1000:.0f} тыс. сессий/с), "
+        f"только заголовки {header_s / len(headers) * 1e6:.1f} мкс/задача"
+    )
+    print(f"  to_dict: {dump_s * 1000:6.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# app/bench_storage.py
+"""Размер tasks.json и время записи/чтения в старом и компактном форматах.
+
+Запуск из корня проекта:
+    python -m app.bench_storage                  # 100 000 сессий
+    python -m app.bench_storage --sessions 20000 --tasks 50
+    python -m app.bench_storage --memory --sessions 200000   # объекты/столбцы/лениво
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from . import storage
+from .models import Session, Task
+from .storage import JsonStorage, loads_json
+
+
+def make_tasks(n_tasks, n_sessions, seed=0):
+    rnd = random.Random(seed)
+    base = datetime(2023, 1, 1, 8, 0)
+    tasks = []
+    per_task = n_sessions // n_tasks
+    for i in range(n_tasks):
+        sessions = []
+        moment = base + timedelta(minutes=rnd.randint(0, 600))
+        for _ in range(per_task):
+            start = moment + timedelta(seconds=rnd.randint(60, 6 * 3600))
+            end = start + timedelta(seconds=rnd.randint(60, 2 * 3600))
+            sessions.append(Session(start, end))
+            moment = end
+        tasks.append(
+            Task(
+                None,
+                f"Задача {i}",
+                description="Описание задачи " * 3,
+                sessions=sessions,
+                deadline=base + timedelta(days=365),
+            )
+        )
+    return tasks
+
+
+def measure(tasks, compact, runs):
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = JsonStorage(
+            os.path.join(tmp, "tasks.json"),
+            os.path.join(tmp, "tasks.journal.jsonl"),
+            compact=compact,
+        )
+        t0 = time.perf_counter()
+        backend.save_tasks(tasks)
+        save_s = time.perf_counter() - t0
+        size = os.path.getsize(backend.path)
+        with open(backend.path, "rb") as f:
+            raw = f.read()
+
+        parse_s = load_s = full_s = None
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            loads_json(raw)
+            t1 = time.perf_counter()
+            loaded = backend.load_tasks()
+            t2 = time.perf_counter()
+            # компактный формат разбирает историю при первом обращении —
+            # считаем и полное время, с разбором всех сессий
+            count = sum(len(t.sessions) for t in loaded)
+            t3 = time.perf_counter()
+            parse_s = min(parse_s or t1 - t0, t1 - t0)
+            load_s = min(load_s or t2 - t1, t2 - t1)
+            full_s = min(full_s or t3 - t1, t3 - t1)
+        assert count == sum(len(t.sessions) for t in tasks)
+    return size, save_s, parse_s, load_s, full_s
+
+
+def measure_memory(tasks, columns, lazy=False):
+    """Время load_tasks, МБ, занятые загруженными задачами, и пик во время чтения."""
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = JsonStorage(
+            os.path.join(tmp, "tasks.json"),
+            os.path.join(tmp, "tasks.journal.jsonl"),
+            compact=True,
+            columns=columns,
+            lazy=lazy,
+        )
+        backend.save_tasks(tasks)
+        t0 = time.perf_counter()
+        backend.load_tasks()
+        load_s = time.perf_counter() - t0
+        tracemalloc.start()
+        loaded = backend.load_tasks()
+        if not lazy:
+            # история компактного снимка разбирается при первом обращении
+            for t in loaded:
+                t.sessions
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del loaded
+    return load_s, current / 1024 / 1024, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--memory", action="store_true")
+    args = parser.parse_args()
+
+    tasks = make_tasks(args.tasks, args.sessions)
+    if args.memory:
+        print(f"{args.tasks} задач, {args.sessions} сессий; память после load_tasks")
+        variants = (
+            ("объекты", False, False),
+            ("столбцы", True, False),
+            ("лениво", False, True),
+        )
+        for name, columns, lazy in variants:
+            load_s, current, peak = measure_memory(tasks, columns, lazy)
+            print(
+                f"{name:>8}: load_tasks {load_s * 1000:5.0f} мс, "
+                f"{current:6.1f} МБ (пик {peak:6.1f} МБ)"
+            )
+        return
+
+    print(
+        f"{args.tasks} задач, {args.sessions} сессий; время чтения — лучшее из {args.runs}"
+    )
+
+    fast_codec = storage.orjson
+    codecs = (
+        [("orjson", fast_codec), ("json", None)] if fast_codec else [("json", None)]
+    )
+    for codec, module in codecs:
+        storage.orjson = module
+        for name, compact in (("старый", False), ("компактный", True)):
+            size, save_s, parse_s, load_s, full_s = measure(tasks, compact, args.runs)
+            print(
+                f"{codec:>6} {name:>10}: {size / 1024 / 1024:6.2f} МБ, "
+                f"запись {save_s * 1000:5.0f} мс, разбор JSON {parse_s * 1000:4.0f} мс, "
+                f"load_tasks {load_s * 1000:5.0f} мс "
+                f"(со всеми сессиями {full_s * 1000:5.0f} мс)"
+            )
+    storage.orjson = fast_codec
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QDate
 from datetime import datetime
-from .models import Task
+from .models import PERIOD_TYPES, Task
 from .translations import tr  # используем перевод
 
 
@@ -109,8 +109,10 @@ class EditTaskDialog(QDialog):
         self.recurrence_combo.addItems(
             [tr("None"), tr("Daily"), tr("Weekly"), tr("Monthly")]
         )
-        self.recurrence_combo.setCurrentText(
-            getattr(self.task, "recurrence", tr("None"))
+        # пункт 0 — «Нет», дальше по порядку PERIOD_TYPES
+        period_type = self.task.period_type if self.task.is_periodic else None
+        self.recurrence_combo.setCurrentIndex(
+            PERIOD_TYPES.index(period_type) + 1 if period_type in PERIOD_TYPES else 0
         )
         right_layout.addWidget(self.recurrence_combo)
 
@@ -217,19 +219,10 @@ class EditTaskDialog(QDialog):
             self.task.pomodoro_break = 0
             self.task.pomodoro_cycles = 0
 
-        # Периодичность
-        self.task.periodicity = (
-            self.periodicity_cb.currentText()
-            if hasattr(self, "periodicity_cb")
-            else None
-        )
-
-        # Дедлайн включён или нет
-        self.task.deadline_enabled = (
-            self.enable_deadline_cb.isChecked()
-            if hasattr(self, "enable_deadline_cb")
-            else False
-        )
+        # Периодичность (включён ли дедлайн, видно по task.deadline_enabled)
+        index = self.recurrence_combo.currentIndex()
+        self.task.is_periodic = index > 0
+        self.task.period_type = PERIOD_TYPES[index - 1] if index > 0 else None
 
         self.task.is_completed = self.completed_cb.isChecked()
 
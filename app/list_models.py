@@ -0,0 +1,215 @@
+# app/list_models.py
+from datetime import date
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QSortFilterProxyModel, Qt
+from PyQt5.QtGui import QBrush, QColor
+from .models import SessionColumn
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# роли для получения самой задачи и её названия без пометок
+TaskRole = Qt.UserRole + 1
+TitleRole = Qt.UserRole + 2
+
+
+class TaskListModel(QAbstractListModel):
+    """Список задач поверх TaskRepository.
+
+    Добавление/редактирование/удаление меняют только свою строку, признак
+    просрочки кешируется и пересчитывается лишь при смене дня.
+    """
+
+    def __init__(self, repository, parent=None):
+        super().__init__(parent)
+        self.repository = repository
+        self._today = date.today()
+        self._overdue = {}  # id -> bool
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.repository)
+
+    def _is_overdue(self, task):
+        flag = self._overdue.get(task.id)
+        if flag is None:
+            flag = self._overdue[task.id] = task.is_overdue(self._today)
+        return flag
+
+    def data(self, index, role=Qt.DisplayRole):
+        task = self.repository.at(index.row()) if index.isValid() else None
+        if task is None:
+            return None
+        if role == Qt.DisplayRole:
+            text = task.title or "(no title)"
+            if getattr(task, "is_completed", False):
+                text += " (✓)"
+            if self._is_overdue(task):
+                text = "❗ " + text
+            return text
+        if role == TitleRole:
+            return task.title or "(no title)"
+        if role == TaskRole:
+            return task
+        return None
+
+    def task_at(self, row):
+        return self.repository.at(row)
+
+    def index_of(self, task_id):
+        row = self.repository.row_of(task_id)
+        return self.index(row) if row >= 0 else QModelIndex()
+
+    def add_task(self, task):
+        row = len(self.repository)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.repository.add(task)
+        self.endInsertRows()
+        return row
+
+    def update_task(self, task):
+        row = self.repository.replace(task)
+        if row >= 0:
+            self._overdue.pop(task.id, None)
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx)
+        return row
+
+    def remove_task(self, task_id):
+        row = self.repository.row_of(task_id)
+        if row < 0:
+            return row
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.repository.remove(task_id)
+        self._overdue.pop(task_id, None)
+        self.endRemoveRows()
+        return row
+
+    def reset_tasks(self, tasks):
+        self.beginResetModel()
+        self.repository.reset(tasks)
+        self._overdue.clear()
+        self.endResetModel()
+
+    def refresh_overdue(self):
+        """При смене дня обновляет только строки, у которых поменялась просрочка."""
+        today = date.today()
+        if today == self._today:
+            return
+        self._today = today
+        for row, task in enumerate(self.repository):
+            old = self._overdue.pop(task.id, None)
+            if old is not None and old != self._is_overdue(task):
+                idx = self.index(row)
+                self.dataChanged.emit(idx, idx)
+
+
+class TaskTitleProxyModel(QSortFilterProxyModel):
+    """Названия задач без пометок с фильтром по подстроке (для страницы отчётов)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFilterRole(TitleRole)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            role = TitleRole
+        return super().data(index, role)
+
+
+class SessionListModel(QAbstractListModel):
+    """История сессий одной задачи.
+
+    Строки форматируются лениво — только когда представление запрашивает
+    видимую строку. При обновлении сообщаем представлению лишь о новых строках
+    и об изменившихся открытых сессиях, а не пересоздаём весь список.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._task = None
+        self._count = 0
+        self._open_rows = set()
+        self._cache = {}  # row -> текст (только для закрытых сессий)
+        self._running_text = ""
+        self._running_brush = QBrush(QColor("#2ecc71"))
+
+    @property
+    def task(self):
+        return self._task
+
+    def set_task(self, task):
+        self.beginResetModel()
+        self._task = task
+        self._count = len(task.sessions) if task else 0
+        self._cache.clear()
+        self._open_rows = self._find_open_rows(0)
+        self.endResetModel()
+
+    def clear(self):
+        self.set_task(None)
+
+    def set_running_text(self, text):
+        if text == self._running_text:
+            return
+        self._running_text = text
+        for row in self._open_rows:
+            self._emit_row_changed(row)
+
+    def _find_open_rows(self, first):
+        if not self._task:
+            return set()
+        sessions = self._task.sessions
+        if isinstance(sessions, SessionColumn):
+            # без создания Session на каждую строку истории
+            return {r for r in sessions.open_rows(first) if r < self._count}
+        return {r for r in range(first, self._count) if sessions[r].end is None}
+
+    def _emit_row_changed(self, row):
+        idx = self.index(row)
+        self.dataChanged.emit(idx, idx)
+
+    def sync(self):
+        """Подтягивает изменения сессий задачи: новые строки и закрытые сессии."""
+        if not self._task:
+            return
+        sessions = self._task.sessions
+        new_count = len(sessions)
+        if new_count < self._count:
+            # сессии удалили — дешевле начать заново
+            self.set_task(self._task)
+            return
+
+        # ранее открытые сессии могли закрыться
+        for row in sorted(self._open_rows):
+            if sessions[row].end is not None:
+                self._open_rows.discard(row)
+                self._cache.pop(row, None)
+                self._emit_row_changed(row)
+
+        if new_count > self._count:
+            first = self._count
+            self.beginInsertRows(QModelIndex(), first, new_count - 1)
+            self._count = new_count
+            self.endInsertRows()
+            self._open_rows |= self._find_open_rows(first)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not self._task:
+            return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            text = self._cache.get(row)
+            if text is not None:
+                return text
+            s = self._task.sessions[row]
+            start = s.start.strftime(TIME_FORMAT)
+            if s.end is None:
+                return f"{start} — {self._running_text}"
+            text = f"{start} — {s.end.strftime(TIME_FORMAT)}"
+            self._cache[row] = text
+            return text
+        if role == Qt.BackgroundRole and row in self._open_rows:
+            return self._running_brush
+        return None
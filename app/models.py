@@ -1,13 +1,72 @@
+import functools
 import json
+import math
 import uuid
-from datetime import datetime
-from typing import Optional, List
+from array import array
+from dataclasses import InitVar, dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional, List
 
 
+# короткие ключи компактного формата tasks.json (см. Task.to_compact)
+COMPACT_KEYS = {
+    "id": "i",
+    "title": "t",
+    "description": "d",
+    "comment": "c",
+    "start_date": "sd",
+    "deadline": "dl",
+    "is_completed": "ok",
+    "time_allocated": "ta",
+    "time_spent": "ts",
+    "is_periodic": "p",
+    "period_type": "pt",
+    "use_pomodoro": "pu",
+    "pomodoro_work": "pw",
+    "pomodoro_break": "pb",
+    "pomodoro_long": "pl",
+    "pomodoro_cycles": "pc",
+    "sessions": "s",
+}
+
+# значения полей, которых нет в записи (файлы старых версий)
+TASK_DEFAULTS = {
+    "id": None,
+    "title": "",
+    "description": "",
+    "comment": "",
+    "start_date": None,
+    "deadline": None,
+    "is_completed": False,
+    "time_allocated": 60,
+    "time_spent": 0,
+    "is_periodic": False,
+    "period_type": None,
+    "use_pomodoro": False,
+    "pomodoro_work": 25,
+    "pomodoro_break": 5,
+    "pomodoro_long": 15,
+    "pomodoro_cycles": 4,
+    "sessions": (),
+}
+COMPACT_DEFAULTS = {COMPACT_KEYS[k]: v for k, v in TASK_DEFAULTS.items()}
+
+# значения Task.period_type (None — задача не повторяется)
+PERIOD_TYPES = ("daily", "weekly", "monthly")
+
+
+def to_epoch(moment: Optional[datetime]) -> Optional[float]:
+    """Локальное время -> секунды epoch с долями (микросекунды сохраняются).
+
+    Снимки, записанные раньше, хранят целые секунды — читаются так же.
+    """
+    return moment.timestamp() if moment else None
+
+
+@dataclass(slots=True, eq=False)
 class Session:
-    def __init__(self, start: datetime, end: Optional[datetime] = None):
-        self.start = start
-        self.end = end
+    start: datetime
+    end: Optional[datetime] = None
 
     def to_dict(self):
         return {
@@ -22,49 +81,289 @@ class Session:
         return cls(start=start, end=end)
 
 
+class ColumnSession(Session):
+    """Сессия-представление строки SessionColumn.
+
+    datetime создаются при чтении атрибута, запись end попадает прямо в
+    столбец. Два представления одной строки равны между собой.
+    """
+
+    __slots__ = ("_column", "_index")
+
+    def __init__(self, column: "SessionColumn", index: int):
+        self._column = column
+        self._index = index
+
+    @property
+    def start(self):
+        return datetime.fromtimestamp(self._column.starts[self._index])
+
+    @property
+    def end(self):
+        value = self._column.ends[self._index]
+        return None if math.isnan(value) else datetime.fromtimestamp(value)
+
+    @end.setter
+    def end(self, value):
+        self._column.ends[self._index] = value.timestamp() if value else math.nan
+
+    def __eq__(self, other):
+        if isinstance(other, ColumnSession):
+            return self._column is other._column and self._index == other._index
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self._column), self._index))
+
+
+class SessionColumn:
+    """Сессии задачи столбцами: начала и концы в секундах epoch (array('d')).
+
+    Открытая сессия — NaN в ends. Ведёт себя как список Session, но объекты
+    создаются только при обращении к строке: 16 байт на сессию вместо
+    объекта с двумя datetime.
+    """
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, starts=(), ends=()):
+        self.starts = array("d", starts)
+        self.ends = array("d", ends)
+
+    @classmethod
+    def from_sessions(cls, sessions):
+        col = cls()
+        for s in sessions:
+            col.append(s)
+        return col
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """Из пар [start, end] в секундах epoch (end = None — открытая сессия)."""
+        nan = math.nan
+        return cls((a for a, _ in pairs), (nan if b is None else b for _, b in pairs))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("session index out of range")
+        return ColumnSession(self, index)
+
+    def __iter__(self):
+        return (ColumnSession(self, i) for i in range(len(self)))
+
+    def __reversed__(self):
+        return (ColumnSession(self, i) for i in range(len(self) - 1, -1, -1))
+
+    def append(self, session: Session):
+        self.starts.append(session.start.timestamp())
+        self.ends.append(session.end.timestamp() if session.end else math.nan)
+
+    def open_rows(self, first=0):
+        """Номера строк открытых сессий, начиная с first."""
+        ends = self.ends
+        return {i for i in range(first, len(ends)) if math.isnan(ends[i])}
+
+    def between(self, start: datetime, end: datetime, now=None) -> "SessionColumn":
+        """Сессии, пересекающие интервал [start, end), тоже столбцами."""
+        lo, hi = start.timestamp(), end.timestamp()
+        now_ts = (now or datetime.now()).timestamp()
+        picked = SessionColumn()
+        for a, b in zip(self.starts, self.ends):
+            if a < hi and (now_ts if math.isnan(b) else b) > lo:
+                picked.starts.append(a)
+                picked.ends.append(b)
+        return picked
+
+    def to_pairs(self):
+        """Пары [start, end] в секундах epoch (как to_epoch)."""
+        return [
+            [a, None if math.isnan(b) else b] for a, b in zip(self.starts, self.ends)
+        ]
+
+
+def session_pairs(sessions):
+    """Пары [start, end] в секундах epoch для списка Session или SessionColumn."""
+    if isinstance(sessions, SessionColumn):
+        return sessions.to_pairs()
+    return [[to_epoch(s.start), to_epoch(s.end)] for s in sessions]
+
+
+def sessions_from_pairs(pairs, columns=False):
+    """Сессии из пар [start, end] в секундах epoch: список Session или SessionColumn."""
+    if columns:
+        return SessionColumn.from_pairs(pairs)
+    fromts = datetime.fromtimestamp
+    return [Session(fromts(a), fromts(b) if b is not None else None) for a, b in pairs]
+
+
+class TimeAggregates:
+    """Суммы закрытых сессий задачи по дням, неделям и месяцам.
+
+    Сессия учитывается в корзинах по дате своего начала (как и раньше в
+    compute_task_time). Открытые сессии хранятся отдельно и досчитываются
+    на лету, поэтому корзины меняются только при закрытии сессии.
+    """
+
+    __slots__ = ("total", "by_day", "by_week", "by_month", "open")
+
+    def __init__(self):
+        self.total = 0.0
+        self.by_day = {}  # date -> секунды
+        self.by_week = {}  # date понедельника -> секунды
+        self.by_month = {}  # (год, месяц) -> секунды
+        self.open = []  # незакрытые сессии
+
+    @staticmethod
+    def buckets(moment: datetime):
+        day = moment.date()
+        week = day - timedelta(days=day.weekday())
+        return day, week, (moment.year, moment.month)
+
+    def add(self, session: "Session"):
+        if session.end is None:
+            self.open.append(session)
+            return
+        delta = (session.end - session.start).total_seconds()
+        day, week, month = self.buckets(session.start)
+        self.total += delta
+        self.by_day[day] = self.by_day.get(day, 0) + delta
+        self.by_week[week] = self.by_week.get(week, 0) + delta
+        self.by_month[month] = self.by_month.get(month, 0) + delta
+
+    def close(self, session: "Session"):
+        """Переносит закрытую сессию из открытых в корзины."""
+        try:
+            self.open.remove(session)
+        except ValueError:
+            pass
+        self.add(session)
+
+    @classmethod
+    def from_sessions(cls, sessions):
+        """Агрегаты по списку сессий: суммы по дням, а недели и месяцы — из дней."""
+        agg = cls()
+        by_day = agg.by_day
+        total = 0.0
+        if isinstance(sessions, SessionColumn):
+            # прямо по столбцам, без создания Session на каждую строку
+            fromts = date.fromtimestamp
+            for i, (a, b) in enumerate(zip(sessions.starts, sessions.ends)):
+                if math.isnan(b):
+                    agg.open.append(sessions[i])
+                    continue
+                day = fromts(a)
+                by_day[day] = by_day.get(day, 0) + (b - a)
+                total += b - a
+        else:
+            for s in sessions:
+                if s.end is None:
+                    agg.open.append(s)
+                    continue
+                delta = (s.end - s.start).total_seconds()
+                day = s.start.date()
+                by_day[day] = by_day.get(day, 0) + delta
+                total += delta
+        agg.total = total
+        # дней намного меньше, чем сессий — корзины недель и месяцев считаем по ним
+        for day, seconds in by_day.items():
+            week = day - timedelta(days=day.weekday())
+            month = (day.year, day.month)
+            agg.by_week[week] = agg.by_week.get(week, 0) + seconds
+            agg.by_month[month] = agg.by_month.get(month, 0) + seconds
+        return agg
+
+
+@dataclass(slots=True, eq=False)
 class Task:
-    def __init__(
-        self,
-        id: Optional[str],
-        title: str,
-        description: str = "",
-        comment: str = "",
-        start_date: Optional[datetime] = None,
-        deadline: Optional[datetime] = None,
-        is_completed: bool = False,
-        time_allocated: int = 60,
-        time_spent: int = 0,
-        is_periodic: bool = False,
-        period_type: Optional[str] = None,
-        sessions: Optional[List[Session]] = None,
-        # Pomodoro settings
-        use_pomodoro: bool = False,
-        pomodoro_work: int = 25,
-        pomodoro_break: int = 5,
-        pomodoro_long: int = 15,
-        pomodoro_cycles: int = 4,
-    ):
-        self.id = id or str(uuid.uuid4())
-        self.title = title
-        self.description = description
-        self.comment = comment
-        self.start_date = start_date or datetime.now()
-        self.deadline = deadline
-        self.is_completed = is_completed
-        self.time_allocated = time_allocated
-        self.time_spent = time_spent
-        self.is_periodic = is_periodic
-        self.period_type = period_type
-        self.sessions = sessions or []
-
-        # Pomodoro
-        self.use_pomodoro = use_pomodoro
-        self.pomodoro_work = pomodoro_work
-        self.pomodoro_break = pomodoro_break
-        self.pomodoro_long = pomodoro_long
-        self.pomodoro_cycles = pomodoro_cycles
+    """Задача. Все поля сохраняются; aggregates вычисляются из sessions.
+
+    eq=False — задачи, как и раньше, сравниваются по идентичности (их ищут в
+    списках и моделях Qt), а slots не даёт завести несохраняемый атрибут.
+    """
+
+    id: Optional[str]
+    title: str
+    description: str = ""
+    comment: str = ""
+    start_date: Optional[datetime] = None
+    deadline: Optional[datetime] = None
+    is_completed: bool = False
+    time_allocated: int = 60
+    time_spent: int = 0
+    # повтор задачи: period_type — один из PERIOD_TYPES (None — не повторяется)
+    is_periodic: bool = False
+    period_type: Optional[str] = None
+    # список Session или SessionColumn; читается через свойство sessions (см.
+    # после класса), чтобы историю можно было подгрузить при первом обращении
+    sessions: InitVar[Optional[List[Session]]] = None
+    # Pomodoro settings
+    use_pomodoro: bool = False
+    pomodoro_work: int = 25
+    pomodoro_break: int = 5
+    pomodoro_long: int = 15
+    pomodoro_cycles: int = 4
+    _sessions: Optional[List[Session]] = field(default=None, init=False, repr=False)
+    _session_loader: Optional[Callable] = field(default=None, init=False, repr=False)
+    _aggregates: Optional["TimeAggregates"] = field(
+        default=None, init=False, repr=False
+    )
+
+    def __post_init__(self, sessions):
+        if not self.id:
+            self.id = str(uuid.uuid4())
+        if self.start_date is None:
+            self.start_date = datetime.now()
+        self._sessions = sessions if sessions is not None else []
+
+    @property
+    def deadline_enabled(self) -> bool:
+        return self.deadline is not None
+
+    def defer_sessions(self, loader: Callable):
+        """История задачи будет прочитана loader() при первом обращении к sessions."""
+        self._sessions = None
+        self._session_loader = loader
+        self._aggregates = None
+
+    @property
+    def sessions_loaded(self) -> bool:
+        return self._sessions is not None
+
+    def _get_sessions(self):
+        if self._sessions is None:
+            self._sessions = self._session_loader()
+            self._session_loader = None
+        return self._sessions
+
+    def _set_sessions(self, sessions):
+        self._sessions = sessions
+        self._session_loader = None
+        self._aggregates = None
+
+    @property
+    def aggregates(self) -> TimeAggregates:
+        """Агрегаты сессий; считаются при первом обращении."""
+        if self._aggregates is None:
+            self._aggregates = TimeAggregates.from_sessions(self.sessions)
+        return self._aggregates
 
     def to_dict(self):
+        data = self._fields()
+        data["sessions"] = [
+            {"start": s.start.isoformat(), "end": s.end.isoformat() if s.end else None}
+            for s in self.sessions
+        ]
+        return data
+
+    def _fields(self):
+        """Все сохраняемые поля, кроме сессий."""
         return {
             "id": self.id,
             "title": self.title,
@@ -77,7 +376,6 @@ class Task:
             "time_spent": self.time_spent,
             "is_periodic": self.is_periodic,
             "period_type": self.period_type,
-            "sessions": [s.to_dict() for s in self.sessions],
             # Pomodoro
             "use_pomodoro": self.use_pomodoro,
             "pomodoro_work": self.pomodoro_work,
@@ -87,40 +385,107 @@ class Task:
         }
 
     @classmethod
-    def from_dict(cls, data):
-        start_date = (
-            datetime.fromisoformat(data["start_date"])
-            if data.get("start_date")
-            else None
-        )
-        deadline = (
-            datetime.fromisoformat(data["deadline"]) if data.get("deadline") else None
-        )
-        sessions_data = data.get("sessions", [])
-        sessions = [Session.from_dict(s) for s in sessions_data]
+    def from_dict(cls, data, columns=False):
+        """columns=True — сессии в SessionColumn вместо списка Session."""
+        d = TASK_DEFAULTS | data  # одно слияние вместо data.get на каждое поле
+        fromiso = datetime.fromisoformat
+        sd, dl = d["start_date"], d["deadline"]
+        sessions = [
+            Session(fromiso(s["start"]), fromiso(s["end"]) if s.get("end") else None)
+            for s in d["sessions"]
+        ]
+        if columns:
+            sessions = SessionColumn.from_sessions(sessions)
         return cls(
-            id=data.get("id"),
-            title=data.get("title", ""),
-            description=data.get("description", ""),
-            comment=data.get("comment", ""),
-            start_date=start_date,
-            deadline=deadline,
-            is_completed=data.get("is_completed", False),
-            time_allocated=data.get("time_allocated", 60),
-            time_spent=data.get("time_spent", 0),
-            is_periodic=data.get("is_periodic", False),
-            period_type=data.get("period_type"),
-            sessions=sessions,
-            use_pomodoro=data.get("use_pomodoro", False),
-            pomodoro_work=data.get("pomodoro_work", 25),
-            pomodoro_break=data.get("pomodoro_break", 5),
-            pomodoro_long=data.get("pomodoro_long", 15),
-            pomodoro_cycles=data.get("pomodoro_cycles", 4),
+            d["id"],
+            d["title"],
+            d["description"],
+            d["comment"],
+            fromiso(sd) if sd else None,
+            fromiso(dl) if dl else None,
+            d["is_completed"],
+            d["time_allocated"],
+            d["time_spent"],
+            d["is_periodic"],
+            d["period_type"],
+            sessions,
+            d["use_pomodoro"],
+            d["pomodoro_work"],
+            d["pomodoro_break"],
+            d["pomodoro_long"],
+            d["pomodoro_cycles"],
+        )
+
+    def to_compact(self, with_sessions=True):
+        """Компактная запись: короткие ключи, сессии — пары [start, end] в секундах epoch.
+
+        with_sessions=False — только заголовок (история не читается и не пишется).
+        """
+        data = {COMPACT_KEYS[k]: v for k, v in self._fields().items()}
+        if with_sessions:
+            data["s"] = session_pairs(self.sessions)
+        return data
+
+    @classmethod
+    def from_compact(cls, data, columns=False):
+        """Задача из компактной записи (см. to_compact).
+
+        Список Session строится при первом обращении к sessions: datetime из
+        секунд epoch создаётся в несколько раз дольше, чем из ISO-строки, а
+        при запуске нужна история в основном одной выбранной задачи.
+        """
+        d = COMPACT_DEFAULTS | data
+        fromiso = datetime.fromisoformat
+        sd, dl = d["sd"], d["dl"]
+        pairs = d["s"]
+        task = cls(
+            d["i"],
+            d["t"],
+            d["d"],
+            d["c"],
+            fromiso(sd) if sd else None,
+            fromiso(dl) if dl else None,
+            d["ok"],
+            d["ta"],
+            d["ts"],
+            d["p"],
+            d["pt"],
+            SessionColumn.from_pairs(pairs) if columns else None,
+            d["pu"],
+            d["pw"],
+            d["pb"],
+            d["pl"],
+            d["pc"],
         )
+        if not columns and pairs:
+            task.defer_sessions(functools.partial(sessions_from_pairs, pairs))
+        return task
 
-    def is_overdue(self) -> bool:
-        from datetime import datetime, date
+    def rebuild_aggregates(self):
+        """Пересчитывает агрегаты после замены списка sessions целиком."""
+        self._aggregates = None
 
+    def open_session(self, start: Optional[datetime] = None) -> Session:
+        # агрегаты строятся лениво — берём их до изменения sessions, иначе
+        # новая сессия попала бы в них дважды
+        agg = self.aggregates
+        self.sessions.append(Session(start=start or datetime.now(), end=None))
+        # для SessionColumn — представление добавленной строки
+        s = self.sessions[-1]
+        agg.add(s)
+        return s
+
+    def close_session(self, end: Optional[datetime] = None) -> Optional[Session]:
+        """Закрывает последнюю открытую сессию и возвращает её (или None)."""
+        agg = self.aggregates  # до изменения sessions (см. open_session)
+        for s in reversed(self.sessions):
+            if s.end is None:
+                s.end = end or datetime.now()
+                agg.close(s)
+                return s
+        return None
+
+    def is_overdue(self, today: Optional[date] = None) -> bool:
         if not self.deadline:
             return False
 
@@ -130,4 +495,10 @@ class Task:
         else:
             deadline_date = self.deadline
 
-        return (not self.is_completed) and (deadline_date < datetime.now().date())
+        today = today or datetime.now().date()
+        return (not self.is_completed) and (deadline_date < today)
+
+
+# задаётся после класса: внутри тела dataclass принял бы property за значение
+# по умолчанию аргумента sessions
+Task.sessions = property(Task._get_sessions, Task._set_sessions)
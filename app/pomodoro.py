@@ -0,0 +1,213 @@
+# app/pomodoro.py
+"""Pomodoro-таймер без Qt: фазы, границы рабочих сессий и события.
+
+Движок ничего не знает о виджетах, звуках и хранилище — он только сообщает
+подписчикам, когда открыть/закрыть сессию и когда сменилась фаза. Время берёт
+из подменяемых часов, поэтому дни циклов в тестах проходят за миллисекунды.
+"""
+import time
+from collections import namedtuple
+from datetime import datetime
+
+# фазы (ключи переводов)
+WORK = "Work"
+BREAK = "Break"
+LONG_BREAK = "Long break"
+
+# виды событий
+PHASE = "phase"  # началась фаза phase
+SESSION_OPEN = "session_open"  # открыть рабочую сессию в момент at
+SESSION_CLOSE = "session_close"  # закрыть рабочую сессию в момент at
+STOPPED = "stopped"  # таймер остановлен (кнопкой или после сна)
+
+# если граница фазы пропущена больше чем на столько секунд (или настенные часы
+# ушли вперёд монотонных), считаем, что компьютер спал
+SLEEP_GAP = 120
+
+PomodoroEvent = namedtuple("PomodoroEvent", "kind phase cycle at")
+
+
+class SystemClock:
+    """Монотонные часы для интервалов и настенные (epoch) для времени сессий."""
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def time(self):
+        return time.time()
+
+
+class PomodoroEngine:
+    """Состояние таймера одной задачи.
+
+    С pomodoro=False это обычный секундомер: одна рабочая сессия до stop().
+    Виджет вызывает poll() на границе фазы (seconds_to_deadline) и при
+    обновлении экрана; пропущенные границы проходятся по очереди с настоящими
+    моментами смены фаз.
+    """
+
+    def __init__(
+        self,
+        work=25 * 60,
+        short_break=5 * 60,
+        long_break=15 * 60,
+        cycles_before_long=4,
+        pomodoro=True,
+        clock=None,
+        sleep_gap=SLEEP_GAP,
+    ):
+        # нулевые длительности зациклили бы проход по пропущенным фазам
+        self.work = max(1, work)
+        self.short_break = max(1, short_break)
+        self.long_break = max(1, long_break)
+        self.cycles_before_long = max(1, cycles_before_long)
+        self.pomodoro = pomodoro
+        self.clock = clock or SystemClock()
+        self.sleep_gap = sleep_gap
+        self.listeners = []
+
+        self.running = False
+        self.phase = None
+        self.current_cycle = 0
+        self.deadline = None  # конец фазы по clock.monotonic()
+        self.started = None
+        self._last_mono = None
+        self._last_wall = None
+
+    @classmethod
+    def for_task(cls, task, clock=None):
+        return cls(
+            work=int(task.pomodoro_work) * 60,
+            short_break=int(task.pomodoro_break) * 60,
+            long_break=int(task.pomodoro_long) * 60,
+            cycles_before_long=int(task.pomodoro_cycles),
+            pomodoro=bool(getattr(task, "use_pomodoro", False)),
+            clock=clock,
+        )
+
+    def subscribe(self, callback):
+        """callback(PomodoroEvent) вызывается на каждое событие."""
+        self.listeners.append(callback)
+
+    @property
+    def is_break(self):
+        return self.phase in (BREAK, LONG_BREAK)
+
+    def _emit(self, events, kind, wall):
+        event = PomodoroEvent(
+            kind, self.phase, self.current_cycle, datetime.fromtimestamp(wall)
+        )
+        events.append(event)
+        for callback in list(self.listeners):
+            callback(event)
+
+    def _mark(self, mono, wall):
+        self._last_mono = mono
+        self._last_wall = wall
+
+    def _halt(self):
+        self.running = False
+        self.deadline = None
+        self.phase = None
+
+    def start(self):
+        """Запускает таймер с рабочей фазы; возвращает список событий."""
+        events = []
+        if self.running:
+            return events
+        mono, wall = self.clock.monotonic(), self.clock.time()
+        self.running = True
+        self.started = mono
+        self.current_cycle = 0
+        self.phase = WORK
+        self.deadline = mono + self.work if self.pomodoro else None
+        self._mark(mono, wall)
+        self._emit(events, PHASE, wall)
+        self._emit(events, SESSION_OPEN, wall)
+        return events
+
+    def stop(self):
+        """Останавливает таймер, закрывая рабочую сессию, если она идёт."""
+        events = []
+        if not self.running:
+            return events
+        wall = self.clock.time()
+        if not self.is_break:
+            self._emit(events, SESSION_CLOSE, wall)
+        self._halt()
+        self._emit(events, STOPPED, wall)
+        return events
+
+    def _sleep_start(self, mono, wall):
+        """Настенное время засыпания, если с прошлого опроса был сон, иначе None.
+
+        Сравниваются приращения двух часов с прошлого опроса. time.monotonic()
+        во сне ведёт себя по-разному: на Linux стоит (CLOCK_MONOTONIC), на
+        Windows и macOS обычно идёт дальше. Поэтому признаков два:
+
+        * настенные часы ушли вперёд монотонных больше чем на sleep_gap —
+          монотонные стояли во сне. Перевод системных часов вперёд на столько
+          же тоже выглядит как сон; перевод назад сном не считается;
+        * граница фазы пропущена больше чем на sleep_gap — монотонные шли во
+          сне (или процесс «замёрз»). В режиме секундомера границ нет, и такой
+          сон не отличить от работы.
+
+        Остановка короче sleep_gap сном не считается ни в одном из случаев.
+        """
+        mono_gap = mono - self._last_mono
+        suspended = (wall - self._last_wall) - mono_gap > self.sleep_gap
+        missed = self.deadline is not None and mono - self.deadline > self.sleep_gap
+        if not (suspended or missed):
+            return None
+        # засчитываем время до сна, но не дальше конца текущей фазы
+        awake = mono_gap
+        if self.deadline is not None:
+            awake = min(awake, self.deadline - self._last_mono)
+        return min(wall, self._last_wall + max(0.0, awake))
+
+    def _advance(self, events, wall):
+        if self.is_break:
+            self.phase = WORK
+            self.deadline += self.work
+            self._emit(events, PHASE, wall)
+            self._emit(events, SESSION_OPEN, wall)
+            return
+        self._emit(events, SESSION_CLOSE, wall)
+        self.current_cycle += 1
+        if self.current_cycle % self.cycles_before_long == 0:
+            self.phase, duration = LONG_BREAK, self.long_break
+        else:
+            self.phase, duration = BREAK, self.short_break
+        self.deadline += duration
+        self._emit(events, PHASE, wall)
+
+    def poll(self):
+        """Проходит наступившие границы фаз; возвращает список событий."""
+        events = []
+        if not self.running:
+            return events
+        mono, wall = self.clock.monotonic(), self.clock.time()
+        slept_at = self._sleep_start(mono, wall)
+        if slept_at is not None:
+            # после сна не продолжаем: время без пользователя работой не считается
+            if not self.is_break:
+                self._emit(events, SESSION_CLOSE, slept_at)
+            self._halt()
+            self._emit(events, STOPPED, wall)
+            return events
+        while self.deadline is not None and self.deadline <= mono:
+            self._advance(events, wall - (mono - self.deadline))
+        self._mark(mono, wall)
+        return events
+
+    def seconds_to_deadline(self):
+        """Сколько осталось до смены фазы (None — секундомер или таймер стоит)."""
+        if not self.running or self.deadline is None:
+            return None
+        return max(0.0, self.deadline - self.clock.monotonic())
+
+    def elapsed(self):
+        """Секунд с момента запуска."""
+        if not self.running:
+            return 0.0
+        return self.clock.monotonic() - self.started
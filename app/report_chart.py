@@ -0,0 +1,223 @@
+# app/report_chart.py
+import numpy as np
+from matplotlib.ticker import MaxNLocator
+from matplotlib.colors import LinearSegmentedColormap
+from .translations import tr
+
+BAR_WIDTH = 0.4
+
+
+def format_hours(h):
+    n = int(h)
+    k = int((h - n) * 60)
+    if tr.lang == "Русский":
+        return f"{n} ч, {k} мин"
+    else:
+        return f"{n} h, {k} min"
+
+
+class ReportChart:
+    """График отчёта: одни оси и одно подключение обработчиков на всё время жизни.
+
+    Повторные построения меняют высоты баров и подписи на месте; бары
+    пересоздаются (двумя вызовами ax.bar) только при смене числа периодов.
+    """
+
+    def __init__(self, figure, canvas, settings=None):
+        self.figure = figure
+        self.canvas = canvas
+        self.settings = settings or {}
+        dark = self.settings.get("dark_theme")
+
+        self.figure.set_facecolor("#1a1a1a")
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_facecolor("#222831")
+        self.ax.tick_params(axis="y", colors="white")
+        self.ax.tick_params(axis="x", colors="white")
+        self.ax.yaxis.set_major_formatter(
+            lambda x, _: f"{int(x)}h {int((x-int(x))*60)}m"
+        )
+        self.ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+        self.ax.grid(color="#444", linestyle="--", alpha=0.5)
+        self.title = self.ax.set_title("", color="white", pad=15)
+
+        self.color_alloc = LinearSegmentedColormap.from_list(
+            "blue_grad", ["#3399ff", "#007bff"]
+        )(0.8)
+        self.color_spent = LinearSegmentedColormap.from_list(
+            "green_grad", ["#2ecc71", "#1abc9c"]
+        )(0.8)
+
+        self.x = np.arange(0)
+        self.seconds = (np.zeros(0), np.zeros(0))  # выделено / затрачено
+        self.heights = (np.zeros(0), np.zeros(0))  # то же в часах
+        self.bars = None
+        self.legend = None
+
+        self.tooltip = self.ax.annotate(
+            "",
+            xy=(0, 0),
+            xytext=(0, 25),  # смещаем подсказку вниз, чтобы не перекрывала легенду
+            textcoords="offset points",
+            ha="center",
+            va="bottom",
+            fontsize=10,
+            bbox=dict(
+                boxstyle="round,pad=0.3",
+                fc="#222831" if dark else "white",
+                alpha=0.9,
+            ),
+            color="white" if dark else "black",
+            arrowprops=dict(
+                arrowstyle="->",
+                color="#222831" if dark else "black",
+            ),
+            # подсказка рисуется отдельно поверх сохранённого фона (blitting)
+            animated=True,
+        )
+        self.tooltip.set_visible(False)
+        self._background = None
+        self._hovered = None
+
+        self.figure.tight_layout()
+        self.figure.subplots_adjust(bottom=0.25)
+        # обработчики подключаются один раз на весь срок жизни графика
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self.canvas.mpl_connect("motion_notify_event", self._on_motion)
+
+    def _set_bars(self, allocated_h, spent_h):
+        n = len(allocated_h)
+        if self.bars is not None and len(self.bars[0]) == n:
+            for container, heights in zip(self.bars, (allocated_h, spent_h)):
+                for rect, h in zip(container, heights):
+                    rect.set_height(h)
+            return
+        if self.bars is not None:
+            for container in self.bars:
+                container.remove()
+        self.bars = (
+            self.ax.bar(
+                self.x - BAR_WIDTH / 2,
+                allocated_h,
+                BAR_WIDTH,
+                color=self.color_alloc,
+                alpha=0.8,
+            ),
+            self.ax.bar(
+                self.x + BAR_WIDTH / 2,
+                spent_h,
+                BAR_WIDTH,
+                color=self.color_spent,
+                alpha=0.9,
+            ),
+        )
+        if self.legend is None:
+            self.legend = self.ax.legend(
+                list(self.bars),
+                [tr("Allocated"), tr("Spent")],
+                facecolor="#2a2a2a",
+                edgecolor="#444",
+                labelcolor="white",
+            )
+
+    def update(self, dates, allocated_seconds, spent_seconds, title):
+        """Показывает новые данные: dates — даты периодов, время — в секундах."""
+        allocated = np.asarray(allocated_seconds, dtype=float)
+        spent = np.asarray(spent_seconds, dtype=float)
+        self.x = np.arange(len(dates))
+        self.seconds = (allocated, spent)
+        self.heights = (allocated / 3600, spent / 3600)
+        self._set_bars(*self.heights)
+
+        self.ax.set_xticks(self.x)
+        self.ax.set_xticklabels(
+            [d.strftime("%d.%m") for d in dates],
+            rotation=45,
+            ha="right",
+            color="white",
+        )
+        self.ax.set_xlim(-0.5, max(len(dates), 1) - 0.5)
+        top = max(self.heights[0].max(initial=0), self.heights[1].max(initial=0))
+        self.ax.set_ylim(0, top * 1.05 or 1)
+
+        self.ax.set_ylabel(tr("Hours"), color="white")
+        self.title.set_text(f"{tr('Report for task:')} {title}")
+        if self.legend is not None:
+            for text, label in zip(
+                self.legend.get_texts(), (tr("Allocated"), tr("Spent"))
+            ):
+                text.set_text(label)
+        self._reset_hover()
+        self.canvas.draw_idle()
+
+    def clear(self):
+        """Пустой график (нет данных за период)."""
+        self.update([], [], [], "")
+        self.title.set_text("")
+
+    def _reset_hover(self):
+        self._hovered = None
+        self.tooltip.set_visible(False)
+
+    def _blit_tooltip(self):
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        if self.tooltip.get_visible():
+            self.figure.draw_artist(self.tooltip)
+        self.canvas.blit(self.figure.bbox)
+
+    def _on_draw(self, event):
+        # после полной перерисовки запоминаем фон без подсказки
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        if self.tooltip.get_visible():
+            self.figure.draw_artist(self.tooltip)
+
+    def _hit_test(self, event):
+        """Номер периода и серия под курсором — по координате x, без перебора баров."""
+        if event.inaxes != self.ax or event.xdata is None or event.ydata is None:
+            return None
+        i = int(np.floor(event.xdata + 0.5))
+        if not 0 <= i < len(self.x):
+            return None
+        dx = event.xdata - self.x[i]
+        if -BAR_WIDTH <= dx < 0:
+            series = 0
+        elif 0 <= dx < BAR_WIDTH:
+            series = 1
+        else:
+            return None
+        height = self.heights[series][i]
+        return (i, series) if 0 <= event.ydata <= height else None
+
+    def _on_motion(self, event):
+        hit = self._hit_test(event)
+        if hit == self._hovered:
+            return
+        self._hovered = hit
+        if hit is None:
+            self.tooltip.set_visible(False)
+            self._blit_tooltip()
+            return
+
+        i, series = hit
+        label = (tr("Allocated"), tr("Spent"))[series]
+        seconds = self.seconds[series][i]
+        self.tooltip.set_text(f"{label}: {format_hours(seconds / 3600)}")
+        self.tooltip.xy = (
+            self.x[i] + (series - 0.5) * BAR_WIDTH,
+            self.heights[series][i],
+        )
+
+        # базовое смещение вниз
+        offset_x, offset_y = 0, -25
+
+        # если близко к правому краю, смещаем влево
+        xlim = self.ax.get_xlim()
+        if event.xdata + 0.1 * (xlim[1] - xlim[0]) > xlim[1]:
+            offset_x = -50  # или подбираем динамически
+
+        self.tooltip.set_position((offset_x, offset_y))
+        self.tooltip.set_visible(True)
+        self._blit_tooltip()
@@ -0,0 +1,62 @@
+# app/report_data.py
+"""Данные отчётов по сессиям задачи (без Qt): затраченное время по дням.
+
+numpy импортируется при первом вызове, а не при запуске приложения.
+"""
+from datetime import datetime, time
+from .models import SessionColumn
+
+
+def _covered_seconds(points, t):
+    """Для отсортированных моментов points: сумма max(0, t - p) по всем p, для каждого t."""
+    import numpy as np
+
+    k = np.searchsorted(points, t, side="right")
+    csum = np.concatenate(([0.0], np.cumsum(points)))
+    return t * k - csum[k]
+
+
+def _epoch_bounds(sessions, now):
+    """Начала и концы сессий в секундах epoch; открытые сессии — до now."""
+    import numpy as np
+
+    if isinstance(sessions, SessionColumn):
+        # столбцы читаются numpy без копирования и без создания Session
+        starts = np.frombuffer(sessions.starts, dtype=np.float64)
+        ends = np.frombuffer(sessions.ends, dtype=np.float64)
+        return starts, np.where(np.isnan(ends), now.timestamp(), ends)
+    starts = np.array([s.start.timestamp() for s in sessions], dtype=np.float64)
+    ends = np.array([(s.end or now).timestamp() for s in sessions], dtype=np.float64)
+    return starts, ends
+
+
+def daily_spent(sessions, start_date, end_date, now=None):
+    """Затраченные секунды по дням от start_date до end_date включительно.
+
+    sessions — список Session или SessionColumn. Сессии, переходящие через
+    полночь, делятся по границам суток. Считается без цикла по дням: F(t) —
+    суммарное время сессий до момента t, тогда время за день равно
+    F(конец дня) - F(начало дня).
+    """
+    import numpy as np
+
+    now = now or datetime.now()
+    days = np.arange(np.datetime64(start_date, "D"), np.datetime64(end_date, "D") + 1)
+    spent = np.zeros(len(days))
+    if not len(days) or not len(sessions):
+        return days, spent
+
+    starts, ends = _epoch_bounds(sessions, now)
+    valid = ends > starts
+    starts = np.sort(starts[valid])
+    ends = np.sort(ends[valid])
+
+    # границы суток — местные полуночи в секундах epoch
+    edges = np.array(
+        [
+            datetime.combine(day, time()).timestamp()
+            for day in np.append(days, days[-1] + 1).astype(object)
+        ]
+    )
+    covered = _covered_seconds(starts, edges) - _covered_seconds(ends, edges)
+    return days, np.diff(covered)
@@ -6,32 +6,36 @@ from PyQt5.QtWidgets import (
     QLabel,
     QPushButton,
     QLineEdit,
-    QListWidget,
+    QListView,
     QDateEdit,
     QComboBox,
 )
 from PyQt5.QtCore import QDate, Qt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-from matplotlib.ticker import MaxNLocator
-from matplotlib.colors import LinearSegmentedColormap
-import numpy as np
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
 from .translations import tr
-from .storage import load_tasks
+from .storage import sessions_between
+from .list_models import TaskTitleProxyModel, TaskRole
+from .report_data import daily_spent
+from .task_store import TaskStore
 from .tasks_widget import format_seconds
 
+# numpy, pandas и matplotlib (вместе с report_chart) импортируются при первом
+# показе страницы отчётов, а не при запуске приложения
+
 
 class ReportsWidget(QWidget):
-    def __init__(self, settings=None):
+    def __init__(self, settings=None, store=None):
         super().__init__()
         self.settings = settings or {}
-        self.tasks = load_tasks()
+        # то же хранилище задач, что и на странице задач — без повторного чтения с диска
+        self.store = store or TaskStore(parent=self)
+        self.task_model = self.store.model
+        self._plotted = None  # (task_id, start, end, period) последнего графика
+        self._stale = False
+        self.chart = None  # создаётся при первом показе страницы (_ensure_chart)
         self._build_ui()
         self.apply_font_size()
         self.retranslateUi()
-        self.populate_task_list()
 
     def _build_ui(self):
         self.layout = QVBoxLayout(self)
@@ -40,7 +44,11 @@ class ReportsWidget(QWidget):
         self.search_label = QLabel()
         self.search = QLineEdit()
         self.search.textChanged.connect(self.filter_tasks)
-        self.task_list = QListWidget()
+        self.task_proxy = TaskTitleProxyModel(self)
+        self.task_proxy.setSourceModel(self.task_model)
+        self.task_list = QListView()
+        self.task_list.setUniformItemSizes(True)
+        self.task_list.setModel(self.task_proxy)
         self.task_list.setMinimumHeight(120)
 
         self.layout.addWidget(self.search_label)
@@ -75,13 +83,16 @@ class ReportsWidget(QWidget):
         btn_row.addWidget(self.btn_plot)
         self.layout.addLayout(btn_row)
 
-        self.figure = Figure(figsize=(10, 4))
-        self.canvas = FigureCanvas(self.figure)
         self.time_info = QLabel()
         self.layout.addWidget(self.time_info)
-        self.layout.addWidget(self.canvas)
+        # место под график; сам холст matplotlib добавляется в _ensure_chart
+        self.chart_layout = QVBoxLayout()
+        self.layout.addLayout(self.chart_layout)
 
         self.btn_plot.clicked.connect(self.plot_selected)
+        self.store.task_changed.connect(self._on_task_changed)
+        self.store.task_removed.connect(self._on_task_changed)
+        self.store.reloaded.connect(lambda: self._on_task_changed(None))
 
     def retranslateUi(self):
         self.search_label.setText(tr("Select a task:"))
@@ -96,55 +107,90 @@ class ReportsWidget(QWidget):
         # ensure time_info is cleared
         self.time_info.setText("")
 
+    def _ensure_chart(self):
+        """Создаёт фигуру и холст matplotlib при первой необходимости."""
+        if self.chart is not None:
+            return self.chart
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+        from .report_chart import ReportChart
+
+        self.figure = Figure(figsize=(10, 4))
+        self.canvas = FigureCanvas(self.figure)
+        self.chart = ReportChart(self.figure, self.canvas, self.settings)
+        self.chart_layout.addWidget(self.canvas)
+        return self.chart
+
+    def showEvent(self, event):
+        self._ensure_chart()
+        super().showEvent(event)
+
     def populate_task_list(self):
-        # наполняем список задач (всегда берём из storage, чтобы учесть изменения)
-        self.tasks = load_tasks()
-        self.task_list.clear()
-        for t in self.tasks:
-            title = t.title or "(no title)"
-            self.task_list.addItem(title)
+        # список задач — прокси над общей моделью, достаточно сбросить фильтр
+        self.search.clear()
 
     def refresh_data(self):
         """Обновляет данные графиков после изменения задач."""
-        self.populate_task_list()
+        self.task_proxy.invalidateFilter()
+        if self._stale:
+            self._stale = False
+            self._replot()
+
+    def _on_task_changed(self, task_id):
+        # перестраиваем график только если изменилась именно показанная задача
+        if self._plotted and task_id in (None, self._plotted[0]):
+            if self.isVisible():
+                self._replot()
+            else:
+                self._stale = True
+
+    def _replot(self):
+        if not self._plotted:
+            return
+        task_id, start, end, period = self._plotted
+        task = self.store.get(task_id)
+        if task is None:
+            self._plotted = None
+            self.time_info.setText("")
+            self._ensure_chart().clear()
+            return
+        self.plot_task(task, start, end, period)
 
     def filter_tasks(self):
-        text = self.search.text().lower()
-        self.task_list.clear()
-        for t in self.tasks:
-            if text in (t.title or "").lower():
-                self.task_list.addItem(t.title)
+        self.task_proxy.setFilterFixedString(self.search.text())
 
     def plot_selected(self):
-        item = self.task_list.currentItem()
-        if not item:
+        idx = self.task_list.currentIndex()
+        if not idx.isValid():
             return
-        task = next((t for t in self.tasks if t.title == item.text()), None)
+        task = self.task_proxy.data(idx, TaskRole)
         if not task:
             return
         start = self.start_date.date().toPyDate()
         end = self.end_date.date().toPyDate()
         period = self.period_combo.currentText()
+        self._plotted = (task.id, start, end, period)
         self.plot_task(task, start, end, period)
 
     def plot_task(self, task, start_date, end_date, period):
-        dates, spent_seconds, allocated_seconds = [], [], []
-        now = datetime.now()
-        current = start_date
-        while current <= end_date:
-            dates.append(current)
-            spent = 0
-            for s in task.sessions:
-                start_s = s.start.date()
-                end_s = s.end.date() if s.end else now.date()
-                if start_s <= current <= end_s:
-                    spent += ((s.end or now) - s.start).total_seconds()
-            spent_seconds.append(spent)
-            allocated_seconds.append(task.time_allocated * 60)
-            current += timedelta(days=1)
+        import numpy as np
+        import pandas as pd
+
+        chart = self._ensure_chart()
+        # только сессии, пересекающие выбранный диапазон (в SQLite — через индекс)
+        sessions = sessions_between(
+            task,
+            datetime.combine(start_date, time()),
+            datetime.combine(end_date, time()) + timedelta(days=1),
+        )
+        days, spent_seconds = daily_spent(sessions, start_date, end_date)
 
         df = pd.DataFrame(
-            {"date": dates, "spent": spent_seconds, "allocated": allocated_seconds}
+            {
+                "date": days,
+                "spent": spent_seconds,
+                "allocated": np.full(len(days), task.time_allocated * 60.0),
+            }
         )
         df["date"] = pd.to_datetime(df["date"])
 
@@ -156,8 +202,7 @@ class ReportsWidget(QWidget):
 
         if df.empty:
             self.time_info.setText(tr("No data for selected period."))
-            self.figure.clear()
-            self.canvas.draw()
+            chart.clear()
             return
 
         total_spent = df["spent"].sum()
@@ -166,131 +211,13 @@ class ReportsWidget(QWidget):
             f"{tr('Total')}: {format_seconds(total_spent)} | {tr('Allocated')}: {format_seconds(total_alloc)}"
         )
 
-        # draw
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        ax.set_facecolor("#222831")
-        self.figure.set_facecolor("#1a1a1a")
-
-        x = np.arange(len(df))
-        width = 0.4
-
-        cmap_alloc = LinearSegmentedColormap.from_list(
-            "blue_grad", ["#3399ff", "#007bff"]
-        )
-        cmap_spent = LinearSegmentedColormap.from_list(
-            "green_grad", ["#2ecc71", "#1abc9c"]
-        )
-
-        bars1, bars2 = [], []
-        for i in range(len(df)):
-            b1 = ax.bar(
-                x[i] - width / 2,
-                df["allocated"].iloc[i] / 3600,
-                width,
-                color=cmap_alloc(0.8),
-                alpha=0.8,
-            )[0]
-            b2 = ax.bar(
-                x[i] + width / 2,
-                df["spent"].iloc[i] / 3600,
-                width,
-                color=cmap_spent(0.8),
-                alpha=0.9,
-            )[0]
-            bars1.append(b1)
-            bars2.append(b2)
-
-        # Сохраняем бары и создаём аннотацию, если её ещё нет
-        self.tooltip = ax.annotate(
-            "",
-            xy=(0, 0),
-            xytext=(0, 25),  # смещаем подсказку вниз, чтобы не перекрывала легенду
-            textcoords="offset points",
-            ha="center",
-            va="bottom",
-            fontsize=10,
-            bbox=dict(
-                boxstyle="round,pad=0.3",
-                fc="#222831" if self.settings.get("dark_theme") else "white",
-                alpha=0.9,
-            ),
-            color="white" if self.settings.get("dark_theme") else "black",
-            arrowprops=dict(
-                arrowstyle="->",
-                color="#222831" if self.settings.get("dark_theme") else "black",
-            ),
-        )
-        self.tooltip.set_visible(False)
-
-        def format_hours(h):
-            n = int(h)
-            k = int((h - n) * 60)
-            if tr.lang == "Русский":
-                return f"{n} ч, {k} мин"
-            else:
-                return f"{n} h, {k} min"
-
-        def on_motion(event):
-            vis = self.tooltip.get_visible()
-            if event.inaxes == ax:
-                for bar, sec, label in zip(
-                    bars1 + bars2,
-                    list(df["allocated"]) + list(df["spent"]),
-                    [tr("Allocated")] * len(bars1) + [tr("Spent")] * len(bars2),
-                ):
-                    cont, _ = bar.contains(event)
-                    if cont:
-                        text = f"{label}: {format_hours(sec / 3600)}"
-                        self.tooltip.set_text(text)
-                        self.tooltip.xy = (
-                            bar.get_x() + bar.get_width() / 2,
-                            bar.get_height(),
-                        )
-
-                        # базовое смещение вниз
-                        offset_x, offset_y = 0, -25
-
-                        # если близко к правому краю, смещаем влево
-                        xlim = ax.get_xlim()
-                        if event.xdata + 0.1 * (xlim[1] - xlim[0]) > xlim[1]:
-                            offset_x = -50  # или подбираем динамически
-
-                        self.tooltip.set_position((offset_x, offset_y))
-                        self.tooltip.set_visible(True)
-                        self.canvas.draw_idle()
-                        return
-            if vis:
-                self.tooltip.set_visible(False)
-                self.canvas.draw_idle()
-
-        self.figure.canvas.mpl_connect("motion_notify_event", on_motion)
-
-        ax.set_xticks(x)
-        ax.set_xticklabels(
-            [d.strftime("%d.%m") for d in df["date"]],
-            rotation=45,
-            ha="right",
-            color="white",
+        # оси и обработчики живут в self.chart, здесь только обновляем данные
+        chart.update(
+            list(df["date"]),
+            df["allocated"].to_numpy(),
+            df["spent"].to_numpy(),
+            task.title,
         )
-        ax.set_ylabel(tr("Hours"), color="white")
-        ax.tick_params(axis="y", colors="white")
-        ax.tick_params(axis="x", colors="white")
-        ax.set_title(f"{tr('Report for task:')} {task.title}", color="white", pad=15)
-        ax.yaxis.set_major_formatter(lambda x, _: f"{int(x)}h {int((x-int(x))*60)}m")
-        ax.yaxis.set_major_locator(MaxNLocator(integer=True))
-        ax.grid(color="#444", linestyle="--", alpha=0.5)
-        if bars1 and bars2:
-            ax.legend(
-                [bars1[0], bars2[0]],
-                [tr("Allocated"), tr("Spent")],
-                facecolor="#2a2a2a",
-                edgecolor="#444",
-                labelcolor="white",
-            )
-        self.figure.tight_layout()
-        self.figure.subplots_adjust(bottom=0.25)
-        self.canvas.draw()
 
     def apply_font_size(self):
         font_size = (
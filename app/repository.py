@@ -0,0 +1,74 @@
+# app/repository.py
+from typing import List, Optional
+from .models import Task
+from .storage import load_tasks, save_tasks
+
+
+class TaskRepository:
+    """Задачи в памяти: список (порядок отображения) + индекс id → Task."""
+
+    def __init__(self, tasks: Optional[List[Task]] = None):
+        self._tasks = []
+        self._by_id = {}
+        self._rows = {}
+        self.reset(load_tasks() if tasks is None else tasks)
+
+    def reset(self, tasks: List[Task]):
+        self._tasks = list(tasks)
+        self._by_id = {t.id: t for t in self._tasks}
+        # строки исчезнувших при перечитывании задач не должны остаться в индексе
+        self._rows = {}
+        self._reindex()
+
+    def _reindex(self, first=0):
+        for row in range(first, len(self._tasks)):
+            self._rows[self._tasks[row].id] = row
+
+    @property
+    def tasks(self) -> List[Task]:
+        return self._tasks
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __iter__(self):
+        return iter(self._tasks)
+
+    def get(self, task_id) -> Optional[Task]:
+        return self._by_id.get(task_id)
+
+    def at(self, row) -> Optional[Task]:
+        if 0 <= row < len(self._tasks):
+            return self._tasks[row]
+        return None
+
+    def row_of(self, task_id) -> int:
+        return self._rows.get(task_id, -1)
+
+    def add(self, task: Task) -> int:
+        self._tasks.append(task)
+        self._by_id[task.id] = task
+        row = len(self._tasks) - 1
+        self._rows[task.id] = row
+        return row
+
+    def replace(self, task: Task) -> int:
+        """Заменяет задачу с тем же id; возвращает её строку (или -1)."""
+        row = self.row_of(task.id)
+        if row >= 0:
+            self._tasks[row] = task
+            self._by_id[task.id] = task
+        return row
+
+    def remove(self, task_id) -> int:
+        row = self.row_of(task_id)
+        if row < 0:
+            return row
+        del self._tasks[row]
+        del self._by_id[task_id]
+        del self._rows[task_id]
+        self._reindex(row)
+        return row
+
+    def save(self):
+        save_tasks(self._tasks)
@@ -12,9 +12,36 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt
 from .translations import LANGUAGES, tr
 from .storage import load_settings, save_settings
+from .ai_assistant import AI_BACKEND_ORDERS, engine as ai_engine, router as ai_router
 import qdarkstyle
 
 
+def apply_app_font(font_size, main_window=None):
+    """Ставит размер шрифта приложения; страницы, созданные позже, берут его сами.
+
+    Возвращает False, если QApplication ещё не создан.
+    """
+    app = QApplication.instance()
+    if not app:
+        return False
+    font = app.font()
+    font.setPointSize(font_size)
+    app.setFont(font)
+    try:
+        for w in app.allWidgets():
+            w.setFont(font)
+    except Exception:
+        pass
+
+    # обновляем nav buttons шрифт через main window метод — безопаснее напрямую менять main internals
+    if main_window and hasattr(main_window, "update_nav_buttons_font"):
+        try:
+            main_window.update_nav_buttons_font()
+        except Exception:
+            pass
+    return True
+
+
 class SettingsWidget(QWidget):
     def __init__(self, main_window=None, settings=None):
         super().__init__()
@@ -62,6 +89,32 @@ class SettingsWidget(QWidget):
         theme_layout.addWidget(self.dark_theme_cb)
         layout.addLayout(theme_layout)
 
+        # ----------------- Быстрый ИИ на CPU -----------------
+        ai_layout = QHBoxLayout()
+        self.ai_fast_cb = QCheckBox(tr("Fast AI on CPU (int8)"))
+        self.ai_fast_cb.setChecked(self.settings.get("ai_cpu_mode") == "fast")
+        self.ai_fast_cb.stateChanged.connect(self.change_ai_cpu_mode)
+        ai_layout.addWidget(self.ai_fast_cb)
+        layout.addLayout(ai_layout)
+
+        # ----------------- Источник советов ИИ -----------------
+        backend_layout = QHBoxLayout()
+        self.ai_backend_label = QLabel(tr("AI advice source") + ":")
+        self.ai_backend_combo = QComboBox()
+        for order in AI_BACKEND_ORDERS:
+            self.ai_backend_combo.addItem(tr(order), order)
+        current_order = self.settings.get("ai_backend_order", ai_router.order)
+        if current_order not in AI_BACKEND_ORDERS:
+            current_order = ai_router.order
+        self.ai_backend_combo.setCurrentIndex(AI_BACKEND_ORDERS.index(current_order))
+        self.ai_backend_combo.currentIndexChanged.connect(self.change_ai_backend)
+        backend_layout.addWidget(self.ai_backend_label)
+        backend_layout.addWidget(self.ai_backend_combo)
+        layout.addLayout(backend_layout)
+        self.ai_status_label = QLabel()
+        self.ai_status_label.setWordWrap(True)
+        layout.addWidget(self.ai_status_label)
+
         layout.addStretch()
 
     def change_language(self, lang):
@@ -91,6 +144,49 @@ class SettingsWidget(QWidget):
         save_settings(self.settings)
         self.apply_theme()
 
+    def change_ai_cpu_mode(self, state):
+        """Квантованные локальные модели; загруженные перезагрузятся в новом режиме."""
+        mode = "fast" if state == Qt.Checked else "default"
+        self.settings["ai_cpu_mode"] = mode
+        save_settings(self.settings)
+        ai_engine.configure(cpu_mode=mode, threads=self.settings.get("ai_threads"))
+
+    def change_ai_backend(self, index):
+        order = self.ai_backend_combo.itemData(index)
+        if not order:
+            return
+        self.settings["ai_backend_order"] = order
+        save_settings(self.settings)
+        ai_router.configure(order=order)
+        self.update_ai_status()
+
+    def update_ai_status(self):
+        """Показывает, какой источник советов сейчас работает."""
+        stats = ai_router.stats()
+        states = {
+            "ok": tr("available"),
+            "cooldown": tr("paused after errors"),
+            "disabled": tr("no token"),
+            "missing": tr("no model"),
+        }
+        parts = []
+        for name in ("local", "remote"):
+            info = stats[name]
+            text = f"{tr(name)}: {states[info['state']]}"
+            text += f" (✓ {info['successes']} / ✗ {info['failures']}"
+            if info["last_latency"] is not None:
+                text += f", {info['last_latency']:.1f} s"
+            text += ")"
+            parts.append(text)
+        active = tr(stats["active"]) if stats["active"] else "—"
+        parts.append(f"{tr('Active')}: {active}")
+        self.ai_status_label.setText("\n".join(parts))
+
+    def showEvent(self, event):
+        # статистика меняется в фоне — обновляем при каждом открытии страницы
+        self.update_ai_status()
+        super().showEvent(event)
+
     def apply_theme(self):
         """Применяет qdarkstyle или сбрасывает его.
         Дополнительно обновляет стиль навигационных кнопок в main window."""
@@ -128,6 +224,11 @@ class SettingsWidget(QWidget):
     def retranslateUi(self):
         self.lang_label.setText(tr("Language") + ":")
         self.dark_theme_cb.setText(tr("Use dark theme"))
+        self.ai_fast_cb.setText(tr("Fast AI on CPU (int8)"))
+        self.ai_backend_label.setText(tr("AI advice source") + ":")
+        for i, order in enumerate(AI_BACKEND_ORDERS):
+            self.ai_backend_combo.setItemText(i, tr(order))
+        self.update_ai_status()
         self.font_label.setText(tr("Font size") + ":")
         # восстановим список языков и выбранный элемент (названия языков не переводим)
         current = self.lang_combo.currentText()
@@ -148,24 +249,7 @@ class SettingsWidget(QWidget):
     def apply_font_size(self):
         """Применяет текущий размер шрифта ко всему приложению."""
         font_size = int(self.settings.get("font_size", 12))
-        app = QApplication.instance()
-        if app:
-            font = app.font()
-            font.setPointSize(font_size)
-            app.setFont(font)
-            try:
-                for w in app.allWidgets():
-                    w.setFont(font)
-            except Exception:
-                pass
-        else:
+        if not apply_app_font(font_size, self.main_window):
             font = self.font()
             font.setPointSize(font_size)
             self.setFont(font)
-
-        # обновляем nav buttons шрифт через main window метод — безопаснее напрямую менять main internals
-        if self.main_window and hasattr(self.main_window, "update_nav_buttons_font"):
-            try:
-                self.main_window.update_nav_buttons_font()
-            except Exception:
-                pass
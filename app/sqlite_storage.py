@@ -0,0 +1,206 @@
+# app/sqlite_storage.py
+import functools
+import math
+import os
+import sqlite3
+from datetime import datetime
+from typing import List
+from .models import Session, SessionColumn, Task
+from .storage import StorageBackend, JsonStorage, FILE, DB_FILE
+
+# поля задачи, которые хранятся в таблице tasks (сессии — в отдельной таблице)
+TASK_COLUMNS = [
+    "id",
+    "title",
+    "description",
+    "comment",
+    "start_date",
+    "deadline",
+    "is_completed",
+    "time_allocated",
+    "time_spent",
+    "is_periodic",
+    "period_type",
+    "use_pomodoro",
+    "pomodoro_work",
+    "pomodoro_break",
+    "pomodoro_long",
+    "pomodoro_cycles",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    title TEXT,
+    description TEXT,
+    comment TEXT,
+    start_date TEXT,
+    deadline TEXT,
+    is_completed INTEGER,
+    time_allocated INTEGER,
+    time_spent REAL,
+    is_periodic INTEGER,
+    period_type TEXT,
+    use_pomodoro INTEGER,
+    pomodoro_work INTEGER,
+    pomodoro_break INTEGER,
+    pomodoro_long INTEGER,
+    pomodoro_cycles INTEGER
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+    start TEXT NOT NULL,
+    "end" TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_task_start ON sessions(task_id, start);
+"""
+
+
+def _ts(value: datetime):
+    # единый формат с микросекундами, чтобы строки сравнивались как даты
+    return value.isoformat(timespec="microseconds") if value else None
+
+
+class SqliteStorage(StorageBackend):
+    """Задачи и сессии в SQLite; сессии пишутся по одной, без перезаписи всего файла."""
+
+    def __init__(self, path=DB_FILE, migrate_from=FILE, columns=False, lazy=False):
+        is_new = not os.path.exists(path)
+        self.path = path
+        self.columns = columns  # сессии задач в памяти столбцами (SessionColumn)
+        self.lazy = lazy  # сессии задачи читаются запросом при первом обращении
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+        if is_new and migrate_from and os.path.exists(migrate_from):
+            migrate_json_to_sqlite(migrate_from, self)
+
+    def watched_files(self):
+        return [self.path, self.path + "-wal"]
+
+    def _task_row(self, task: Task, position: int):
+        # без сессий: to_dict прочитал бы ещё не загруженную историю задачи
+        data = task._fields()
+        return [position] + [data[c] for c in TASK_COLUMNS]
+
+    def _build_sessions(self, rows):
+        """Список Session (или SessionColumn) из строк (start, end) в ISO."""
+        fromiso = datetime.fromisoformat
+        if self.columns:
+            column = SessionColumn()
+            for start, end in rows:
+                column.starts.append(fromiso(start).timestamp())
+                column.ends.append(fromiso(end).timestamp() if end else math.nan)
+            return column
+        return [Session(fromiso(s), fromiso(e) if e else None) for s, e in rows]
+
+    def _load_sessions(self, task_id):
+        # по индексу (task_id, start) — только строки этой задачи
+        return self._build_sessions(
+            self.conn.execute(
+                'SELECT start, "end" FROM sessions WHERE task_id = ? ORDER BY start',
+                (task_id,),
+            )
+        )
+
+    def load_tasks(self) -> List[Task]:
+        rows = {}
+        if not self.lazy:
+            for task_id, start, end in self.conn.execute(
+                'SELECT task_id, start, "end" FROM sessions ORDER BY task_id, start'
+            ):
+                rows.setdefault(task_id, []).append((start, end))
+        tasks = []
+        cols = ", ".join(TASK_COLUMNS)
+        for row in self.conn.execute(f"SELECT {cols} FROM tasks ORDER BY position"):
+            data = dict(zip(TASK_COLUMNS, row))
+            data["is_completed"] = bool(data["is_completed"])
+            data["is_periodic"] = bool(data["is_periodic"])
+            data["use_pomodoro"] = bool(data["use_pomodoro"])
+            try:
+                t = Task.from_dict(data)
+            except Exception:
+                continue
+            if self.lazy:
+                t.defer_sessions(functools.partial(self._load_sessions, t.id))
+            else:
+                t.sessions = self._build_sessions(rows.pop(t.id, []))
+            tasks.append(t)
+        self.remember_disk_state()
+        return tasks
+
+    def save_tasks(self, tasks: List[Task]):
+        """Обновляет только заголовки задач; сессии пишутся через log_session_*."""
+        placeholders = ", ".join("?" * (len(TASK_COLUMNS) + 1))
+        cols = ["position"] + TASK_COLUMNS
+        # upsert, а не INSERT OR REPLACE: REPLACE удалил бы строку и каскадом её сессии
+        updates = ", ".join(f"{c} = excluded.{c}" for c in cols if c != "id")
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO tasks ({', '.join(cols)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(id) DO UPDATE SET {updates}",
+                [self._task_row(t, i) for i, t in enumerate(tasks)],
+            )
+            ids = [t.id for t in tasks]
+            self.conn.execute(
+                f"DELETE FROM tasks WHERE id NOT IN ({', '.join('?' * len(ids))})",
+                ids,
+            )
+        self.remember_disk_state()
+
+    def log_session_open(self, task: Task, session):
+        with self.conn:
+            self.conn.execute(
+                'INSERT INTO sessions (task_id, start, "end") VALUES (?, ?, ?)',
+                (task.id, _ts(session.start), _ts(session.end)),
+            )
+        self.remember_disk_state()
+
+    def log_session_close(self, task: Task, session):
+        with self.conn:
+            self.conn.execute(
+                'UPDATE sessions SET "end" = ? WHERE task_id = ? AND start = ?',
+                (_ts(session.end), task.id, _ts(session.start)),
+            )
+        self.remember_disk_state()
+
+    def sessions_between(self, task: Task, start: datetime, end: datetime):
+        # индекс (task_id, start) отсекает всё, что началось после конца интервала
+        rows = self.conn.execute(
+            'SELECT start, "end" FROM sessions WHERE task_id = ? AND start < ? '
+            'AND ("end" IS NULL OR "end" > ?) ORDER BY start',
+            (task.id, _ts(end), _ts(start)),
+        )
+        return self._build_sessions(rows)
+
+    def close(self):
+        self.conn.close()
+
+
+def migrate_json_to_sqlite(json_path=FILE, target=DB_FILE):
+    """Однократный перенос tasks.json (вместе с журналом сессий) в SQLite.
+
+    Исходный tasks.json не удаляется и остаётся резервной копией.
+    """
+    if isinstance(target, SqliteStorage):
+        storage = target
+    else:
+        storage = SqliteStorage(target, migrate_from=None)
+    journal_path = os.path.splitext(json_path)[0] + ".journal.jsonl"
+    tasks = JsonStorage(json_path, journal_path).load_tasks()
+    storage.save_tasks(tasks)
+    with storage.conn:
+        storage.conn.execute("DELETE FROM sessions")
+        storage.conn.executemany(
+            'INSERT INTO sessions (task_id, start, "end") VALUES (?, ?, ?)',
+            [(t.id, _ts(s.start), _ts(s.end)) for t in tasks for s in t.sessions],
+        )
+    print(f"✅ Перенесено задач в {storage.path}: {len(tasks)}")
+    return storage
+
+
+if __name__ == "__main__":
+    migrate_json_to_sqlite()
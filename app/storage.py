@@ -1,53 +1,772 @@
+import atexit
+import functools
+import hashlib
 import json
 import os
+import re
+import shutil
+import threading
+from datetime import datetime
 from typing import List
-from .models import Task
+from .models import (
+    SessionColumn,
+    Task,
+    session_pairs,
+    sessions_from_pairs,
+    to_epoch,
+)
+
+try:
+    # быстрый кодек JSON (необязательная зависимость); без него — стандартный json
+    import orjson
+except ImportError:
+    orjson = None
 
 FILE = "tasks.json"
+# база SQLite (используется, если в настройках storage_backend = "sqlite")
+DB_FILE = "tasks.db"
+# журнал событий сессий (JSON Lines): открытие/закрытие сессий дописываются сюда,
+# чтобы не переписывать весь tasks.json на каждый Старт/Стоп
+JOURNAL_FILE = "tasks.journal.jsonl"
+# после стольких записей журнал сворачивается в снимок в фоне
+JOURNAL_COMPACT_THRESHOLD = 200
+# версия компактного формата tasks.json: {"v": 2, "tasks": [...]} с короткими ключами;
+# старый формат — просто список задач с отступами
+COMPACT_VERSION = 2
+# ленивый режим (session_loading = "lazy"): в tasks.json только заголовки задач
+# ({"v": 2, "lazy": true, ...}), сессии каждой задачи — в своём файле в каталоге
+# tasks.sessions/ и читаются при первом обращении к task.sessions
+SESSIONS_DIR_SUFFIX = ".sessions"
+_SAFE_FILE_NAME = re.compile(r"[\w-]+")
+# предыдущая версия tasks.json / settings.json — на случай повреждённого файла
+BACKUP_SUFFIX = ".bak"
+# серия сохранений за это время сводится в одну запись (в фоновом потоке)
+SAVE_DELAY = 0.5
 
 
-def load_tasks() -> List[Task]:
-    if not os.path.exists(FILE):
-        return []
+def dumps_json(data, pretty=False) -> bytes:
+    if pretty:
+        # старый формат пишем как раньше (orjson не умеет отступ 4)
+        return json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8")
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads_json(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def is_compact(doc) -> bool:
+    return isinstance(doc, dict) and doc.get("v") == COMPACT_VERSION
+
+
+def _fsync_dir(path):
+    """fsync каталога, чтобы переименование файла тоже пережило сбой питания."""
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
     try:
-        with open(FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# файлы, которые при последнем чтении не разобрались (см. read_with_backup)
+_unreadable = set()
+
+
+def atomic_write(path, raw: bytes, backup=False):
+    """Записывает файл целиком или не трогает его: tmp + fsync + os.replace.
+
+    backup=True — прежняя версия остаётся рядом с суффиксом BACKUP_SUFFIX
+    (кроме повреждённой: тогда резервной остаётся последняя хорошая).
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    if backup and path not in _unreadable and os.path.exists(path):
+        os.replace(path, path + BACKUP_SUFFIX)
+    os.replace(tmp, path)
+    _unreadable.discard(path)
+    _fsync_dir(path)
+
+
+def read_with_backup(path, parse):
+    """parse(bytes) для файла, а если он повреждён или пропал — для его резервной копии.
+
+    Повреждённый файл сохраняется рядом (.corrupt), чтобы следующая запись его
+    не затёрла. Возвращает None, если прочитать не удалось ни то, ни другое.
+    """
+    _unreadable.discard(path)
+    for candidate in (path, path + BACKUP_SUFFIX):
+        if not os.path.exists(candidate):
+            continue
+        try:
+            with open(candidate, "rb") as f:
+                return parse(f.read())
+        except Exception as e:
+            print(f"⚠️ Не удалось прочитать {candidate}: {e}")
+            if candidate == path:
+                _unreadable.add(path)
+                try:
+                    shutil.copyfile(path, path + ".corrupt")
+                except OSError as e:
+                    print(f"⚠️ Не удалось сохранить копию {path}: {e}")
+    return None
+
+
+class DebouncedWriter:
+    """Откладывает записи на delay секунд и выполняет их в фоновом потоке.
+
+    Записи с одним ключом сводятся в последнюю: десять смен размера шрифта
+    подряд дают одну запись settings.json. flush() выполняет отложенное сразу
+    и дожидается записи, которая уже идёт.
+    """
+
+    def __init__(self, delay=SAVE_DELAY):
+        self.delay = delay
+        self._pending = {}  # ключ -> функция записи без аргументов
+        self._lock = threading.Lock()
+        # держится, пока идёт запись: flush() при закрытии дождётся фоновой
+        self._write_lock = threading.Lock()
+        self._timer = None
+
+    def schedule(self, key, write):
+        with self._lock:
+            self._pending[key] = write
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def busy(self, key) -> bool:
+        """Ждёт ли запись с ключом key или идёт ли запись прямо сейчас."""
+        with self._lock:
+            return key in self._pending or self._write_lock.locked()
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            for write in pending.values():
+                try:
+                    write()
+                except Exception as e:
+                    print(f"⚠️ Ошибка сохранения: {e}")
+
+
+def is_lazy(doc) -> bool:
+    return is_compact(doc) and bool(doc.get("lazy"))
+
+
+def snapshot_items(doc) -> list:
+    """Список задач (dict) из документа tasks.json любого формата."""
+    if is_compact(doc):
+        return doc.get("tasks", [])
+    return doc if isinstance(doc, list) else []
+
+
+class StorageBackend:
+    """Интерфейс хранилища задач и сессий."""
+
+    # умеет ли хранилище prepare_save — запись снимка в фоновом потоке
+    # (см. storage.save_tasks)
+    background_saves = False
+
+    def load_tasks(self) -> List[Task]:
+        raise NotImplementedError
+
+    def save_tasks(self, tasks: List[Task]):
+        """Сохраняет задачи (добавление/редактирование/удаление)."""
+        raise NotImplementedError
+
+    def log_session_open(self, task: Task, session):
+        """Сохраняет открытие сессии задачи."""
+        raise NotImplementedError
+
+    def log_session_close(self, task: Task, session):
+        """Сохраняет закрытие сессии задачи."""
+        raise NotImplementedError
+
+    def sessions_between(self, task: Task, start: datetime, end: datetime):
+        """Сессии задачи, пересекающие интервал [start, end)."""
+        now = datetime.now()
+        if isinstance(task.sessions, SessionColumn):
+            return task.sessions.between(start, end, now)
+        return [s for s in task.sessions if s.start < end and (s.end or now) > start]
+
+    def close(self):
+        pass
+
+    # --- отслеживание внешних изменений файлов ---
+
+    _disk_state = None
+
+    def watched_files(self) -> List[str]:
+        """Файлы, изменение которых извне требует перечитать задачи."""
         return []
-    tasks = []
-    for item in data:
+
+    def _read_disk_state(self, paths=None):
+        state = {}
+        for path in self.watched_files() if paths is None else paths:
+            try:
+                st = os.stat(path)
+                state[path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                state[path] = (None, None)
+        return state
+
+    def remember_disk_state(self, paths=None):
+        """Запоминает mtime файлов после собственного чтения/записи.
+
+        paths — только эти файлы (например, один журнал после дозаписи): чужое
+        изменение остальных файлов тогда по-прежнему будет замечено.
+        """
+        if paths is None or self._disk_state is None:
+            self._disk_state = self._read_disk_state()
+        else:
+            self._disk_state.update(self._read_disk_state(paths))
+
+    def changed_externally(self) -> bool:
+        """True, если файлы менялись с момента нашего последнего чтения/записи."""
+        return self._read_disk_state() != self._disk_state
+
+
+class JsonStorage(StorageBackend):
+    """tasks.json (снимок) + журнал сессий в JSON Lines.
+
+    compact=True — снимок без отступов, с короткими ключами и сессиями в
+    секундах epoch. Читаются оба формата; пишется выбранный.
+    columns=True — сессии задач в памяти хранятся столбцами (SessionColumn).
+    lazy=True — пишется снимок из одних заголовков и файлы сессий по задачам
+    (см. SESSIONS_DIR_SUFFIX); такой снимок читается лениво в любом режиме.
+    """
+
+    background_saves = True
+
+    def __init__(
+        self,
+        path=FILE,
+        journal_path=JOURNAL_FILE,
+        compact=False,
+        columns=False,
+        lazy=False,
+    ):
+        self.path = path
+        self.journal_path = journal_path
+        self.compact = compact
+        self.columns = columns
+        self.lazy = lazy
+        self.sessions_dir = os.path.splitext(path)[0] + SESSIONS_DIR_SUFFIX
+        # _snapshot_lock — запись снимка, _journal_lock — дозапись/ротация журнала;
+        # RLock: ленивая загрузка сессий при сохранении берёт его повторно
+        self._snapshot_lock = threading.RLock()
+        self._journal_lock = threading.Lock()
+        self._journal_lines = 0
+        self._compacting = False
+        # номера подготовленных и записанных сохранений (см. prepare_save)
+        self._saves_prepared = 0
+        self._saves_written = 0
+        # id задач, история которых лежит в файлах сессий (ленивый режим)
+        self._in_session_files = set()
+
+    def watched_files(self):
+        return [self.path, self.journal_path]
+
+    @property
+    def _compacting_path(self):
+        return self.journal_path + ".compacting"
+
+    def changed_externally(self):
+        # пока идёт наша фоновая запись, файлы меняем мы сами
+        if not self._snapshot_lock.acquire(blocking=False):
+            return False
         try:
-            t = Task.from_dict(item)
+            return super().changed_externally()
+        finally:
+            self._snapshot_lock.release()
+
+    @staticmethod
+    def _parse_snapshot(raw):
+        data = loads_json(raw)
+        if not (isinstance(data, list) or is_compact(data)):
+            raise ValueError("не список задач")
+        return data
+
+    def _read_snapshot(self):
+        """Читает сырой снимок tasks.json: список задач или компактный документ.
+
+        Повреждённый файл не превращается молча в пустой список: читается
+        резервная копия (предыдущая версия).
+        """
+        data = read_with_backup(self.path, self._parse_snapshot)
+        return [] if data is None else data
+
+    @staticmethod
+    def _read_journal(path):
+        """Читает события журнала; битая (недописанная) строка пропускается."""
+        if not os.path.exists(path):
+            return []
+        events = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+        return events
+
+    @staticmethod
+    def _apply_journal(doc, events):
+        """Проигрывает события журнала поверх сырого снимка (на месте).
+
+        Повторное проигрывание безопасно: журнал, уже попавший в снимок
+        (запись в фоне, сбой до удаления журнала), сессий не дублирует.
+        """
+        if is_compact(doc):
+            return JsonStorage._apply_journal_compact(doc, events)
+        by_id = {item.get("id"): item for item in doc if isinstance(item, dict)}
+        starts = {}  # id задачи -> начала её сессий (строится по требованию)
+        for ev in events:
+            task_id = ev.get("task")
+            item = by_id.get(task_id)
+            if item is None:
+                continue
+            sessions = item.setdefault("sessions", [])
+            if ev.get("op") == "open":
+                known = starts.get(task_id)
+                if known is None:
+                    known = starts[task_id] = {s.get("start") for s in sessions}
+                if ev["start"] not in known:
+                    known.add(ev["start"])
+                    sessions.append({"start": ev["start"], "end": None})
+            elif ev.get("op") == "close":
+                # ищем с конца: закрывается почти всегда последняя сессия
+                for s in reversed(sessions):
+                    if s.get("start") == ev["start"]:
+                        s["end"] = ev["end"]
+                        break
+        return doc
+
+    @staticmethod
+    def _apply_journal_compact(doc, events):
+        # в журнале время в ISO; в компактном снимке — секунды epoch (пары [start, end])
+        def epoch(value):
+            return to_epoch(datetime.fromisoformat(value)) if value else None
+
+        def same_start(stored, start):
+            # старые снимки хранили целые секунды, журнал — время с микросекундами
+            return stored == start or (type(stored) is int and stored == int(start))
+
+        items = snapshot_items(doc)
+        by_id = {item.get("i"): item for item in items if isinstance(item, dict)}
+        # id задачи -> (начала её сессий, из них целые секунды старых снимков)
+        starts = {}
+        for ev in events:
+            task_id = ev.get("task")
+            item = by_id.get(task_id)
+            if item is None:
+                continue
+            sessions = item.setdefault("s", [])
+            start = epoch(ev.get("start"))
+            if ev.get("op") == "open":
+                known = starts.get(task_id)
+                if known is None:
+                    known = starts[task_id] = (
+                        {s[0] for s in sessions},
+                        {s[0] for s in sessions if type(s[0]) is int},
+                    )
+                if start not in known[0] and int(start) not in known[1]:
+                    known[0].add(start)
+                    sessions.append([start, None])
+            elif ev.get("op") == "close":
+                for s in reversed(sessions):
+                    if same_start(s[0], start):
+                        s[1] = epoch(ev.get("end"))
+                        break
+        return doc
+
+    def _write_snapshot(self, doc):
+        atomic_write(
+            self.path, dumps_json(doc, pretty=not is_compact(doc)), backup=True
+        )
+        self.remember_disk_state([self.path])
+
+    def load_raw(self):
+        """Снимок с проигранным журналом (сырой документ любого формата)."""
+        data = self._read_snapshot()
+        # недосвёрнутый журнал (например, приложение закрылось во время свёртки) идёт первым
+        pending = self._read_journal(self._compacting_path)
+        journal = self._read_journal(self.journal_path)
+        self._journal_lines = len(journal)
+        if is_lazy(data):
+            # сессий в снимке нет — события журнала применяются при чтении
+            # файла сессий задачи (_load_sessions)
+            return data
+        return self._apply_journal(data, pending + journal)
+
+    def load_tasks(self) -> List[Task]:
+        tasks = []
+        doc = self.load_raw()
+        self.remember_disk_state()
+        lazy = is_lazy(doc)
+        self._in_session_files = (
+            {item.get("i") for item in snapshot_items(doc)} if lazy else set()
+        )
+        decode = Task.from_compact if is_compact(doc) else Task.from_dict
+        for item in snapshot_items(doc):
+            try:
+                t = decode(item, columns=self.columns)
+            except Exception:
+                continue
+            if lazy:
+                t.defer_sessions(functools.partial(self._load_sessions, t.id))
             tasks.append(t)
-        except Exception:
-            continue
-    return tasks
+        return tasks
+
+    # --- ленивый режим: файлы сессий по задачам ---
+
+    def _session_path(self, task_id):
+        name = task_id
+        if not _SAFE_FILE_NAME.fullmatch(task_id):
+            name = hashlib.sha1(task_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.sessions_dir, name + ".json")
+
+    def _read_session_pairs(self, task_id):
+        try:
+            with open(self._session_path(task_id), "rb") as f:
+                pairs = loads_json(f.read())
+        except (OSError, ValueError):
+            return []
+        return pairs if isinstance(pairs, list) else []
+
+    def _write_session_pairs(self, task_id, pairs):
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        atomic_write(self._session_path(task_id), dumps_json(pairs))
+
+    def _pending_events(self):
+        """События обоих журналов (сворачиваемого и текущего) по порядку."""
+        return self._read_journal(self._compacting_path) + self._read_journal(
+            self.journal_path
+        )
+
+    def _apply_to_session_files(self, events, skip=()):
+        """Дописывает события журнала в файлы сессий задач (кроме skip)."""
+        by_task = {}
+        for ev in events:
+            if ev.get("task") not in skip:
+                by_task.setdefault(ev.get("task"), []).append(ev)
+        for task_id, task_events in by_task.items():
+            if not isinstance(task_id, str):
+                continue
+            item = {"i": task_id, "s": self._read_session_pairs(task_id)}
+            doc = {"v": COMPACT_VERSION, "tasks": [item]}
+            self._apply_journal_compact(doc, task_events)
+            self._write_session_pairs(task_id, item["s"])
+
+    def _load_sessions(self, task_id):
+        """Сессии одной задачи: её файл плюс ещё не свёрнутые события журнала."""
+        # под блокировкой снимка: свёртка не перенесёт события в файл между чтениями
+        with self._snapshot_lock:
+            item = {"i": task_id, "s": self._read_session_pairs(task_id)}
+            events = [ev for ev in self._pending_events() if ev.get("task") == task_id]
+        if events:
+            self._apply_journal_compact({"v": COMPACT_VERSION, "tasks": [item]}, events)
+        return sessions_from_pairs(item["s"], self.columns)
+
+    def _lazy_document(self, tasks: List[Task]):
+        """Снимок из заголовков и пары сессий прочитанных задач (id -> пары)."""
+        doc = {
+            "v": COMPACT_VERSION,
+            "lazy": True,
+            "tasks": [t.to_compact(with_sessions=False) for t in tasks],
+        }
+        # файл сессий есть только у задач из ленивого снимка; остальные (например,
+        # прочитанные из обычного снимка при включении ленивого режима) пишем целиком
+        loaded = {
+            t.id: session_pairs(t.sessions)
+            for t in tasks
+            if t.sessions_loaded or t.id not in self._in_session_files
+        }
+        return doc, loaded
+
+    def _write_lazy(self, doc, loaded):
+        # у непрочитанных задач события журнала есть только в журнале —
+        # переносим их в файлы сессий, прочитанные пишем из памяти целиком
+        self._apply_to_session_files(self._pending_events(), skip=loaded)
+        for task_id, pairs in loaded.items():
+            self._write_session_pairs(task_id, pairs)
+        self._write_snapshot(doc)
+        ids = {item["i"] for item in doc["tasks"]}
+        self._remove_stale_session_files(ids)
+        self._in_session_files = ids
+
+    def _remove_stale_session_files(self, task_ids):
+        """Удаляет файлы сессий задач, которых больше нет."""
+        if not os.path.isdir(self.sessions_dir):
+            return
+        keep = {os.path.basename(self._session_path(i)) for i in task_ids}
+        for name in os.listdir(self.sessions_dir):
+            if name.endswith(".json") and name not in keep:
+                os.remove(os.path.join(self.sessions_dir, name))
+
+    def _rotate_journal(self):
+        """Переносит журнал в .compacting: новые события пойдут в свежий файл.
+
+        Если .compacting остался от прерванной свёртки, журнал дописывается в
+        его конец — после записи снимка оба уходят вместе, и ничего из
+        свёрнутого не проигрывается повторно.
+        """
+        with self._journal_lock:
+            if not os.path.exists(self.journal_path):
+                return
+            if os.path.exists(self._compacting_path):
+                with open(self._compacting_path, "rb+") as dst:
+                    dst.seek(0, os.SEEK_END)
+                    # недописанная последняя строка не должна склеиться со следующей
+                    if dst.tell():
+                        dst.seek(-1, os.SEEK_END)
+                        if dst.read(1) != b"\n":
+                            dst.write(b"\n")
+                    with open(self.journal_path, "rb") as src:
+                        shutil.copyfileobj(src, dst)
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.remove(self.journal_path)
+            else:
+                os.replace(self.journal_path, self._compacting_path)
+            self._journal_lines = 0
+            self.remember_disk_state([self.journal_path])
+
+    def _drop_rotated_journal(self, generation):
+        """Удаляет .compacting после записи снимка, собранного на поколении generation.
+
+        Если с тех пор было подготовлено новое сохранение, его ротация могла
+        дописать в .compacting события, которых в записанном снимке нет, —
+        тогда файл остаётся до записи того сохранения.
+        """
+        with self._journal_lock:
+            if generation != self._saves_prepared:
+                return
+            if os.path.exists(self._compacting_path):
+                os.remove(self._compacting_path)
+
+    def prepare_save(self, tasks: List[Task]):
+        """Готовит полную запись снимка и возвращает функцию, которая её выполнит.
+
+        Документ собирается здесь, в потоке вызывающего: задачи и их сессии
+        дальше меняет поток интерфейса. Функция записи работает только с
+        готовыми данными, поэтому её можно выполнить в фоне (storage.save_tasks).
+
+        Журнал откладывается в сторону сразу: события, записанные после этого,
+        в документ не попали и остаются в свежем журнале.
+        """
+        with self._journal_lock:
+            self._saves_prepared += 1
+            generation = self._saves_prepared
+        self._rotate_journal()
+        if self.lazy:
+            doc, loaded = self._lazy_document(tasks)
+        elif self.compact:
+            doc = {"v": COMPACT_VERSION, "tasks": [t.to_compact() for t in tasks]}
+        else:
+            doc = [t.to_dict() for t in tasks]
+
+        def write():
+            try:
+                with self._snapshot_lock:
+                    if self.lazy:
+                        self._write_lazy(doc, loaded)
+                    else:
+                        self._write_snapshot(doc)
+                    self._drop_rotated_journal(generation)
+            finally:
+                with self._journal_lock:
+                    self._saves_written = max(self._saves_written, generation)
+
+        return write
+
+    def save_tasks(self, tasks: List[Task]):
+        """Полная запись снимка; журнал до начала записи после этого не нужен."""
+        self.prepare_save(tasks)()
+
+    def _append_event(self, event):
+        line = json.dumps(event, ensure_ascii=False)
+        with self._journal_lock:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._journal_lines += 1
+            self.remember_disk_state([self.journal_path])
+            need_compact = self._journal_lines >= JOURNAL_COMPACT_THRESHOLD
+        if need_compact:
+            self.compact_journal_async()
+
+    def log_session_open(self, task: Task, session):
+        self._append_event(
+            {"op": "open", "task": task.id, "start": session.start.isoformat()}
+        )
+
+    def log_session_close(self, task: Task, session):
+        self._append_event(
+            {
+                "op": "close",
+                "task": task.id,
+                "start": session.start.isoformat(),
+                "end": session.end.isoformat() if session.end else None,
+            }
+        )
+
+    def compact_journal(self):
+        """Сворачивает журнал в снимок tasks.json.
+
+        Журнал сначала переименовывается, так что новые события в это время
+        пишутся уже в свежий файл и не теряются.
+        """
+        with self._snapshot_lock:
+            with self._journal_lock:
+                # подготовленный снимок ещё не записан: свёрнутое им же и затёрлось бы
+                if self._saves_written != self._saves_prepared:
+                    return
+                generation = self._saves_prepared
+            self._rotate_journal()
+            pending = self._read_journal(self._compacting_path)
+            if not pending:
+                return
+            data = self._read_snapshot()
+            if is_lazy(data):
+                self._apply_to_session_files(pending)
+            else:
+                self._write_snapshot(self._apply_journal(data, pending))
+            self._drop_rotated_journal(generation)
+
+    def compact_journal_async(self):
+        """Запускает свёртку журнала в фоновом потоке (не чаще одной одновременно)."""
+        with self._journal_lock:
+            if self._compacting:
+                return
+            self._compacting = True
+
+        def run():
+            try:
+                self.compact_journal()
+            except Exception as e:
+                print(f"⚠️ Ошибка свёртки журнала: {e}")
+            finally:
+                self._compacting = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+_backend = None
+_writer = DebouncedWriter()
+# отложенное не должно пропасть и при выходе мимо closeEvent
+atexit.register(_writer.flush)
+
+
+def get_backend() -> StorageBackend:
+    """Возвращает хранилище, выбранное в настройках (storage_backend)."""
+    global _backend
+    if _backend is None:
+        settings = load_settings()
+        kind = settings.get("storage_backend", "json")
+        # session_storage: "objects" (по умолчанию) или "columns" — сессии в
+        # памяти массивами секунд epoch (для задач с длинной историей)
+        columns = settings.get("session_storage") == "columns"
+        # session_loading: "eager" (по умолчанию) или "lazy" — история задачи
+        # читается при первом обращении, а не при запуске
+        lazy = settings.get("session_loading") == "lazy"
+        if kind == "sqlite":
+            from .sqlite_storage import SqliteStorage
+
+            _backend = SqliteStorage(DB_FILE, columns=columns, lazy=lazy)
+        else:
+            # tasks_format: "pretty" (по умолчанию, как раньше) или "compact"
+            compact = settings.get("tasks_format") == "compact"
+            _backend = JsonStorage(compact=compact, columns=columns, lazy=lazy)
+    return _backend
+
+
+def set_backend(backend: StorageBackend):
+    global _backend
+    if _backend is not None and _backend is not backend:
+        _backend.close()
+    _backend = backend
+
+
+def load_tasks() -> List[Task]:
+    return get_backend().load_tasks()
 
 
 def save_tasks(tasks: List[Task]):
-    data = [t.to_dict() for t in tasks]
-    with open(FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    """Сохраняет задачи; где можно — отложенно, одной записью на серию изменений."""
+    backend = get_backend()
+    if backend.background_saves:
+        _writer.schedule("tasks", backend.prepare_save(tasks))
+    else:
+        backend.save_tasks(tasks)
+
+
+def flush_pending_writes():
+    """Дописывает отложенные сохранения (вызывается при закрытии окна)."""
+    _writer.flush()
+
+
+def log_session_open(task: Task, session):
+    """Записывает открытие сессии задачи."""
+    get_backend().log_session_open(task, session)
+
+
+def log_session_close(task: Task, session):
+    """Записывает закрытие сессии задачи."""
+    get_backend().log_session_close(task, session)
+
+
+def sessions_between(task: Task, start: datetime, end: datetime):
+    return get_backend().sessions_between(task, start, end)
+
+
+def tasks_changed_externally() -> bool:
+    # пока наше сохранение ждёт или пишется, файлы меняем мы сами — проверим в
+    # следующий раз (flush здесь задержал бы поток интерфейса на запись)
+    if _writer.busy("tasks"):
+        return False
+    return get_backend().changed_externally()
 
 
 SETTINGS_FILE = os.path.join(os.path.dirname(__file__), "settings.json")
 
 
-def load_settings():
-    if not os.path.exists(SETTINGS_FILE):
-        return {"language": "Русский", "dark_theme": True, "font_size": 12}
+def _default_settings():
+    return {"language": "Русский", "dark_theme": True, "font_size": 12}
 
-    try:
-        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if not isinstance(data, dict):
-                raise ValueError
-            return data
-    except Exception:
-        # если файл повреждён — восстанавливаем дефолт
-        return {"language": "Русский", "dark_theme": True, "font_size": 12}
+
+def _parse_settings(raw):
+    data = json.loads(raw.decode("utf-8"))
+    if not isinstance(data, dict):
+        raise ValueError("настройки должны быть объектом")
+    return data
+
+
+def load_settings():
+    # повреждённый файл — резервная копия, а если нет и её — настройки по умолчанию
+    data = read_with_backup(SETTINGS_FILE, _parse_settings)
+    return _default_settings() if data is None else data
 
 
 def save_settings(settings):
-    with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-        json.dump(settings, f, ensure_ascii=False, indent=2)
+    """Сохраняет настройки в фоне; частые изменения сводятся в одну запись."""
+    # сериализуем сразу: словарь дальше меняется в потоке интерфейса
+    raw = json.dumps(settings, ensure_ascii=False, indent=2).encode("utf-8")
+    _writer.schedule("settings", lambda: atomic_write(SETTINGS_FILE, raw, backup=True))
@@ -0,0 +1,69 @@
+# app/task_store.py
+from PyQt5.QtCore import QObject, pyqtSignal
+from .list_models import TaskListModel
+from .repository import TaskRepository
+from .storage import (
+    load_tasks,
+    log_session_open,
+    log_session_close,
+    tasks_changed_externally,
+)
+
+
+class TaskStore(QObject):
+    """Единое хранилище задач приложения (создаётся в MainWindow).
+
+    Задачи читаются с диска один раз; повторно — только если файлы изменились
+    извне (см. reload_if_changed). Страницы подписываются на сигналы.
+    """
+
+    # задачи перечитаны с диска целиком
+    reloaded = pyqtSignal()
+    # изменилась задача или её сессии (id задачи)
+    task_changed = pyqtSignal(str)
+    # задача удалена (id задачи)
+    task_removed = pyqtSignal(str)
+
+    def __init__(self, tasks=None, parent=None):
+        super().__init__(parent)
+        self.repository = TaskRepository(tasks)
+        self.model = TaskListModel(self.repository, self)
+
+    def get(self, task_id):
+        return self.repository.get(task_id)
+
+    def add_task(self, task):
+        self.model.add_task(task)
+        self.repository.save()
+        self.task_changed.emit(task.id)
+
+    def update_task(self, task):
+        self.model.update_task(task)
+        self.repository.save()
+        self.task_changed.emit(task.id)
+
+    def remove_task(self, task_id):
+        self.model.remove_task(task_id)
+        self.repository.save()
+        self.task_removed.emit(task_id)
+
+    def open_session(self, task, start=None):
+        s = task.open_session(start)
+        log_session_open(task, s)
+        self.task_changed.emit(task.id)
+        return s
+
+    def close_session(self, task, end=None):
+        s = task.close_session(end)
+        if s:
+            log_session_close(task, s)
+            self.task_changed.emit(task.id)
+        return s
+
+    def reload_if_changed(self) -> bool:
+        """Перечитывает задачи, только если файлы изменились извне (по mtime)."""
+        if not tasks_changed_externally():
+            return False
+        self.model.reset_tasks(load_tasks())
+        self.reloaded.emit()
+        return True
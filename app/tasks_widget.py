@@ -2,23 +2,23 @@ from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
-    QListWidget,
+    QListView,
     QPushButton,
     QLabel,
-    QListWidgetItem,
     QMessageBox,
     QTextEdit,
 )
-from PyQt5.QtCore import QTimer, Qt
-from PyQt5.QtGui import QBrush, QColor
-from .models import Task, Session
-from .storage import load_tasks, save_tasks
+from PyQt5.QtCore import QThreadPool, QTimer, Qt
 from .dialogs import EditTaskDialog
-from datetime import datetime, timedelta
+from .list_models import SessionListModel
+from .task_store import TaskStore
+from datetime import datetime
+import math
 import uuid
 import winsound
 from .translations import tr
-from .ai_assistant import get_task_advice
+from .ai_worker import AdviceWorker, PrecomputeWorker
+from .pomodoro import PHASE, SESSION_CLOSE, SESSION_OPEN, STOPPED, PomodoroEngine
 
 
 def format_seconds(seconds):
@@ -28,77 +28,70 @@ def format_seconds(seconds):
     return f"{h:02}:{m:02}:{s:02}"
 
 
-def compute_task_time(task):
-    now = datetime.now()
-    today_start = datetime(now.year, now.month, now.day)
-    week_start = today_start - timedelta(days=today_start.weekday())
-    month_start = datetime(now.year, now.month, 1)
+def compute_task_time(task, now=None):
+    """Время по задаче за сегодня/неделю/месяц/всего.
 
-    total = 0
-    today = 0
-    week = 0
-    month = 0
+    Закрытые сессии берутся из агрегатов задачи, пересчитываются только открытые,
+    так что стоимость вызова не зависит от длины истории.
+    """
+    now = now or datetime.now()
+    agg = task.aggregates
+    day, week, month_key = agg.buckets(now)
 
-    for s in task.sessions:
-        start = s.start
-        end = s.end or now
-        delta = (end - start).total_seconds()
+    total = agg.total
+    today = agg.by_day.get(day, 0)
+    week_total = agg.by_week.get(week, 0)
+    month = agg.by_month.get(month_key, 0)
+
+    for s in agg.open:
+        delta = (now - s.start).total_seconds()
+        s_day, s_week, s_month = agg.buckets(s.start)
         total += delta
-        if start >= today_start:
+        if s_day == day:
             today += delta
-        if start >= week_start:
-            week += delta
-        if start >= month_start:
+        if s_week == week:
+            week_total += delta
+        if s_month == month_key:
             month += delta
 
-    return {"total": total, "today": today, "week": week, "month": month}
-
-
-class PomodoroManager:
-    """Управляет состоянием Pomodoro-циклов для одной задачи."""
-
-    def __init__(self, task: Task):
-        self.task = task
-        self.work_duration = int(task.pomodoro_work) * 60
-        self.short_break = int(task.pomodoro_break) * 60
-        self.long_break = int(task.pomodoro_long) * 60
-        self.cycles_before_long = int(task.pomodoro_cycles)
-        self.current_cycle = 0
-        self.is_break = False
-
-    def get_initial(self):
-        self.is_break = False
-        self.current_cycle = 0
-        return self.work_duration, tr("Work")
-
-    def next_phase(self):
-        if not self.is_break:
-            self.current_cycle += 1
-            self.is_break = True
-            if self.current_cycle % self.cycles_before_long == 0:
-                return self.long_break, tr("Long break")
-            else:
-                return self.short_break, tr("Break")
-        else:
-            self.is_break = False
-            return self.work_duration, tr("Work")
+    return {"total": total, "today": today, "week": week_total, "month": month}
 
 
 class TasksWidget(QWidget):
-    def __init__(self, settings=None):
+    def __init__(self, settings=None, store=None):
         super().__init__()
         self.settings = settings or {}
-        self.tasks = load_tasks()
+        # хранилище задач общее со страницей отчётов (его создаёт MainWindow)
+        self.store = store or TaskStore(parent=self)
+        self.task_model = self.store.model
         self.active_task_id = None
-        self._running_since = None
 
-        # Pomodoro state
-        self.pomodoro_mgr = None
-        self.pomodoro_remaining = 0
-        self.pomodoro_phase = None  # "Work" / "Break" / "Long break"
+        # таймер/Pomodoro активной задачи (логика — в PomodoroEngine, без Qt)
+        self.engine = None
+        # смена фазы — одиночный таймер ровно на границу фазы
+        self.phase_timer = QTimer(self)
+        self.phase_timer.setSingleShot(True)
+        self.phase_timer.setTimerType(Qt.PreciseTimer)
+        self.phase_timer.timeout.connect(self._refresh_display)
+        # обновление цифр на экране; только пока страница видна
         self.timer = QTimer(self)
         self.timer.setInterval(1000)
-        self.timer.timeout.connect(self._tick)
+        self.timer.timeout.connect(self._refresh_display)
+
+        # генерация советов ИИ идёт в отдельном потоке, по одному запросу за раз
+        self.advice_pool = QThreadPool(self)
+        self.advice_pool.setMaxThreadCount(1)
+        self._advice_worker = None
+        self._advice_request = 0
+        # пакетный предрасчёт советов для всех задач — в своём потоке,
+        # чтобы не задерживать совет для выбранной задачи
+        self.precompute_pool = QThreadPool(self)
+        self.precompute_pool.setMaxThreadCount(1)
+        self._precompute_worker = None
+        self._precompute_timer = QTimer(self)
+        self._precompute_timer.setSingleShot(True)
+        self._precompute_timer.setInterval(5000)
+        self._precompute_timer.timeout.connect(self.precompute_advice)
 
         self._build_ui()
         # apply font if settings supplied via SettingsWidget (main applies too)
@@ -110,8 +103,9 @@ class TasksWidget(QWidget):
         top_layout = QHBoxLayout()
         # Список задач
         left_layout = QVBoxLayout()
-        self.list_widget = QListWidget()
-        self.refresh_list()
+        self.list_widget = QListView()
+        self.list_widget.setUniformItemSizes(True)
+        self.list_widget.setModel(self.task_model)
         btn_row = QHBoxLayout()
         self.btn_add = QPushButton()
         self.btn_edit = QPushButton()
@@ -132,7 +126,11 @@ class TasksWidget(QWidget):
         self.label_spent = QLabel()
         self.label_pomodoro_count = QLabel()
         self.history_label = QLabel(tr("History:"))
-        self.history_list = QListWidget()
+        self.history_model = SessionListModel(self)
+        self.history_list = QListView()
+        # одинаковая высота строк — представление не опрашивает все строки ради размеров
+        self.history_list.setUniformItemSizes(True)
+        self.history_list.setModel(self.history_model)
         self.history_list.setMinimumHeight(100)
         right_layout.addWidget(self.label_timer)
         right_layout.addWidget(self.btn_start_stop)
@@ -156,16 +154,26 @@ class TasksWidget(QWidget):
             "background-color: #f8f9fa; color: #000000; border-radius: 8px; padding: 5px;"
         )
         main_layout.addWidget(self.ai_label)
+        self.btn_precompute = QPushButton()
+        main_layout.addWidget(self.btn_precompute)
 
         # Сигналы
-        self.list_widget.itemSelectionChanged.connect(self.update_ai_for_selected)
+        selection = self.list_widget.selectionModel()
+        selection.currentChanged.connect(self.update_ai_for_selected)
 
         # Connections
         self.btn_add.clicked.connect(self.add_task)
         self.btn_edit.clicked.connect(self.edit_task)
         self.btn_del.clicked.connect(self.delete_task)
-        self.list_widget.itemSelectionChanged.connect(self.show_task_info)
+        selection.currentChanged.connect(self.show_task_info)
         self.btn_start_stop.clicked.connect(self.toggle_timer)
+        self.store.reloaded.connect(self.show_task_info)
+        self.btn_precompute.clicked.connect(self.precompute_advice)
+        if self.settings.get("ai_precompute", False):
+            # после старта и при изменении задач советы считаются в фоне
+            self.store.reloaded.connect(self._precompute_timer.start)
+            self.store.task_changed.connect(self._precompute_timer.start)
+            self._precompute_timer.start()
 
     def retranslateUi(self):
         # переводы всех статичных элементов
@@ -192,43 +200,77 @@ class TasksWidget(QWidget):
                     title_part = parts[1].strip()
                     self.label_info.setText(f"{tr('Tracking')}: {title_part}")
         self.history_label.setText(tr("History:"))
-        # refresh lists and details
-        self.refresh_list()
+        self.btn_precompute.setText(tr("Generate for all tasks"))
+        # refresh details
         self.show_task_info()
 
+    def selected_task(self):
+        """Задача в текущей строке списка (или None)."""
+        idx = self.list_widget.currentIndex()
+        return self.task_model.task_at(idx.row()) if idx.isValid() else None
+
+    def _advice_lang(self):
+        # Определяем язык из настроек
+        lang_setting = self.settings.get("language", "Русский")
+        if lang_setting == "English":
+            return "en"
+        return "ru"
+
     def update_ai_for_selected(self):
         """Обновляет подсказки для выбранной задачи"""
-        item = self.list_widget.currentItem()
-        if not item:
+        self._cancel_advice()
+        task = self.selected_task()
+        if not task:
             self.ai_label.setText("")
             return
 
-        idx = self.list_widget.currentRow()
-        task = self.tasks[idx]
-
-        # Определяем язык из настроек
-        lang_setting = self.settings.get("language", "Русский")
-        if lang_setting == "English":
-            lang = "en"
-        else:
-            lang = "ru"
+        lang = self._advice_lang()
 
         # Показываем заглушку, пока идёт генерация совета
         self.ai_label.setText("💡 " + tr("Generation of AI advice..."))
 
-        # Генерация совета
-        advice = get_task_advice(task, lang=lang)
+        # Генерация совета в фоне; результат придёт в _on_advice_ready
+        self._advice_request += 1
+        worker = AdviceWorker(self._advice_request, task, lang)
+        worker.signals.finished.connect(self._on_advice_ready)
+        worker.signals.partial.connect(self._on_advice_partial)
+        self._advice_worker = worker
+        self.advice_pool.start(worker)
+
+    def _cancel_advice(self):
+        # ещё не начатые запросы убираем из очереди, текущий прерываем
+        self.advice_pool.clear()
+        if self._advice_worker:
+            self._advice_worker.cancel()
+            self._advice_worker = None
+
+    def _on_advice_partial(self, request_id, text):
+        # совет приходит по частям — показываем сразу, не дожидаясь конца
+        if request_id == self._advice_request and text:
+            self.ai_label.setText("💡 " + tr("AI advice:") + f"{text}")
+
+    def _on_advice_ready(self, request_id, advice):
+        if request_id != self._advice_request:
+            return  # пользователь уже выбрал другую задачу
+        self._advice_worker = None
         self.ai_label.setText("💡 " + tr("AI advice:") + f"{advice}")
 
-    def refresh_list(self):
-        self.list_widget.clear()
-        for t in self.tasks:
-            text = t.title or "(no title)"
-            if getattr(t, "is_completed", False):
-                text += " (✓)"
-            if t.is_overdue():
-                text = "❗ " + text
-            self.list_widget.addItem(text)
+    def precompute_advice(self):
+        """Генерирует советы для всех открытых задач пачками в фоне."""
+        if self._precompute_worker:
+            return  # уже идёт; изменения подхватит следующий запуск
+        worker = PrecomputeWorker(self.store.repository.tasks(), self._advice_lang())
+        worker.signals.finished.connect(self._on_precompute_done)
+        self._precompute_worker = worker
+        self.btn_precompute.setEnabled(False)
+        self.precompute_pool.start(worker)
+
+    def _on_precompute_done(self, count):
+        self._precompute_worker = None
+        self.btn_precompute.setEnabled(True)
+        # совет выбранной задачи теперь, скорее всего, уже в кеше
+        if count and self._advice_worker:
+            self.update_ai_for_selected()
 
     def add_task(self):
         dlg = EditTaskDialog(parent=self)
@@ -236,157 +278,146 @@ class TasksWidget(QWidget):
             t = dlg.get_task()
             t.id = str(uuid.uuid4())
             t.start_date = datetime.now()
-            self.tasks.append(t)
-            save_tasks(self.tasks)
-            self.refresh_list()
+            self.store.add_task(t)
 
     def edit_task(self):
-        item = self.list_widget.currentItem()
-        if not item:
+        task = self.selected_task()
+        if not task:
             return
-        idx = self.list_widget.currentRow()
-        dlg = EditTaskDialog(task=self.tasks[idx], parent=self)
+        dlg = EditTaskDialog(task=task, parent=self)
         if dlg.exec_():
-            self.tasks[idx] = dlg.get_task()
-            save_tasks(self.tasks)
-            self.refresh_list()
+            self.store.update_task(dlg.get_task())
+            self.show_task_info()
 
     def delete_task(self):
-        item = self.list_widget.currentItem()
-        if not item:
-            return
-        idx = self.list_widget.currentRow()
-        if idx < 0 or idx >= len(self.tasks):
+        task = self.selected_task()
+        if not task:
             return
-        task = self.tasks[idx]
         ok = QMessageBox.question(
             self, tr("Delete task"), f"{tr('Delete task')} '{task.title}'?"
         )
         if ok == QMessageBox.StandardButton.Yes:
-            del self.tasks[idx]
-            save_tasks(self.tasks)
-            self.refresh_list()
+            self.store.remove_task(task.id)
             # очистим подробности
             self._stop_timer_ui()
 
     def toggle_timer(self):
-        item = self.list_widget.currentItem()
-        if not item:
+        task = self.selected_task()
+        if not task:
             QMessageBox.information(self, tr("Info"), tr("Select a task"))
             return
-        idx = self.list_widget.currentRow()
-        task = self.tasks[idx]
 
         # Запуск
         if self.active_task_id is None:
             self.active_task_id = task.id
-            # Если Pomodoro включён — запуск менеджера
-            if getattr(task, "use_pomodoro", False):
-                self.pomodoro_mgr = PomodoroManager(task)
-                self.pomodoro_remaining, self.pomodoro_phase = (
-                    self.pomodoro_mgr.get_initial()
-                )
-                # если фаза "Work" — создаём сессию
-                if self.pomodoro_phase == tr("Work"):
-                    s = Session(start=datetime.now(), end=None)
-                    task.sessions.append(s)
-                    self._running_since = datetime.now()
-            else:
-                # обычный трекинг: создаём одну сессию (идёт пока не нажмут стоп)
-                s = Session(start=datetime.now(), end=None)
-                task.sessions.append(s)
-                self._running_since = datetime.now()
+            # Если Pomodoro выключен, движок работает как секундомер
+            self.engine = PomodoroEngine.for_task(task)
+            self.engine.subscribe(self._on_engine_event)
+            self.engine.start()
 
             self.btn_start_stop.setText(tr("Stop"))
             self.label_info.setText(
-                f"{tr('Tracking')}: {task.title} — {self.pomodoro_phase or tr('Work')}"
+                f"{tr('Tracking')}: {task.title} — {tr(self.engine.phase)}"
             )
-            self.timer.start()
+            self._schedule_phase_end()
+            self.update_display_timer()
+        elif self.engine:
+            # Стоп (пауза/остановка): движок закроет сессию и пришлёт STOPPED
+            self.engine.stop()
         else:
-            # Стоп (пауза/остановка)
-            current = next((t for t in self.tasks if t.id == self.active_task_id), None)
-            if current:
-                for s in reversed(current.sessions):
-                    if s.end is None:
-                        s.end = datetime.now()
-                        break
-                save_tasks(self.tasks)
+            self._stop_timer_ui()
 
+    def _on_engine_event(self, event):
+        """Сессии и остановка по событиям движка (время сессий — настенное)."""
+        task = self.store.get(self.active_task_id) if self.active_task_id else None
+        if event.kind == SESSION_OPEN and task:
+            self.store.open_session(task, event.at)
+        elif event.kind == SESSION_CLOSE and task:
+            self.store.close_session(task, event.at)
+        elif event.kind == STOPPED:
             self._stop_timer_ui()
 
-    def _tick(self):
-        if not self.active_task_id:
+    def _schedule_phase_end(self):
+        delay = self.engine.seconds_to_deadline() if self.engine else None
+        if delay is None:
+            self.phase_timer.stop()
+        else:
+            self.phase_timer.start(math.ceil(delay * 1000))
+
+    def _poll_engine(self):
+        """Проходит наступившие границы фаз (и сон компьютера) в движке."""
+        events = self.engine.poll()
+        if any(ev.kind == PHASE for ev in events):
+            winsound.MessageBeep()
+        self._schedule_phase_end()
+
+    def _display_visible(self):
+        window = self.window()
+        return self.isVisible() and not (window and window.isMinimized())
+
+    def update_display_timer(self):
+        """Обновляем цифры только пока идёт трекинг и страница видна на экране."""
+        if self.active_task_id and self._display_visible():
+            self._refresh_display()
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_display_timer()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_display_timer()
+
+    def _refresh_display(self):
+        if not self.active_task_id or not self.engine:
             return
-        task = next((t for t in self.tasks if t.id == self.active_task_id), None)
+        self._poll_engine()
+        task = self.store.get(self.active_task_id) if self.engine else None
         if not task:
             return
+        self.task_model.refresh_overdue()
 
-        if getattr(task, "use_pomodoro", False) and self.pomodoro_mgr:
-            # Pomodoro flow
-            self.pomodoro_remaining -= 1
-            if self.pomodoro_remaining < 0:
-                duration, phase = self.pomodoro_mgr.next_phase()
-                # если переход на перерыв — закрываем рабочую сессию
-                if self.pomodoro_mgr.is_break:
-                    for s in reversed(task.sessions):
-                        if s.end is None:
-                            s.end = datetime.now()
-                            break
-                    save_tasks(self.tasks)
-                else:
-                    # переключились на Work => начинаем новую сессию
-                    s = Session(start=datetime.now(), end=None)
-                    task.sessions.append(s)
-                    self._running_since = datetime.now()
-
-                self.pomodoro_remaining = duration
-                self.pomodoro_phase = phase
-                winsound.MessageBeep()
-
-            self.label_timer.setText(format_seconds(self.pomodoro_remaining))
+        remaining = self.engine.seconds_to_deadline()
+        if remaining is not None:
+            # Pomodoro flow: остаток считается от дедлайна, а не копится по тикам
+            self.label_timer.setText(format_seconds(math.ceil(remaining)))
             self.label_info.setText(
-                f"{tr('Tracking')}: {task.title} — {self.pomodoro_phase}"
+                f"{tr('Tracking')}: {task.title} — {tr(self.engine.phase)}"
             )
             self.label_pomodoro_count.setText(
-                f"{tr('Pomodoro')}: {self.pomodoro_mgr.current_cycle}/{self.pomodoro_mgr.cycles_before_long}"
+                f"{tr('Pomodoro')}: {self.engine.current_cycle}/{self.engine.cycles_before_long}"
             )
-            self.update_time_info(task)
-            self._populate_history(task)
+            # следующее обновление — к моменту смены цифры секунд
+            self.timer.setInterval(int((remaining % 1) * 1000) + 5)
         else:
             # обычный счётчик
-            if self._running_since:
-                elapsed = (datetime.now() - self._running_since).total_seconds()
-            else:
-                elapsed = 0
+            elapsed = self.engine.elapsed()
+            self.timer.setInterval(1000)
             self.label_timer.setText(format_seconds(int(task.time_spent + elapsed)))
             self.label_info.setText(f"{tr('Tracking')}: {task.title}")
-            self.update_time_info(task)
-            self._populate_history(task)
+        self.update_time_info(task)
+        self._populate_history(task)
 
     def _stop_timer_ui(self):
+        self.timer.stop()
+        self.phase_timer.stop()
         self.active_task_id = None
-        self._running_since = None
-        self.pomodoro_mgr = None
-        self.pomodoro_remaining = 0
-        self.pomodoro_phase = None
+        self.engine = None
         self.btn_start_stop.setText(tr("Start"))
         self.label_timer.setText("00:00:00")
         self.label_info.setText(tr("Select a task"))
         self.label_pomodoro_count.setText("")
-        self.history_list.clear()
+        self.history_model.clear()
 
     def show_task_info(self):
-        item = self.list_widget.currentItem()
-        if not item:
+        task = self.selected_task()
+        if not task:
             self.label_spent.setText("")
-            self.history_list.clear()
+            self.history_model.clear()
             return
-        idx = self.list_widget.currentRow()
-        if idx < 0 or idx >= len(self.tasks):
-            # индекс недействителен — ничего не делаем
-            self.history_label.clear()  # или обновляем интерфейс соответствующим образом
-            return
-        task = self.tasks[idx]
         self.update_time_info(task)
         self._populate_history(task)
 
@@ -397,20 +428,13 @@ class TasksWidget(QWidget):
         )
 
     def _populate_history(self, task):
-        self.history_list.clear()
-        now = datetime.now()
-        for s in task.sessions:
-            start = s.start.strftime("%Y-%m-%d %H:%M:%S")
-            end = (
-                s.end.strftime("%Y-%m-%d %H:%M:%S")
-                if s.end
-                else tr("...running") if self.pomodoro_phase else "идёт..."
-            )
-            entry = f"{start} — {end}"
-            item_widget = QListWidgetItem(entry)
-            if s.end is None:
-                item_widget.setBackground(QBrush(QColor("#2ecc71")))
-            self.history_list.addItem(item_widget)
+        self.history_model.set_running_text(
+            tr("...running") if self.engine and self.engine.pomodoro else "идёт..."
+        )
+        if self.history_model.task is task:
+            self.history_model.sync()
+        else:
+            self.history_model.set_task(task)
 
     def apply_font_size(self):
         # локальный запасной метод: применим размер шрифта от self.settings, если есть
@@ -424,13 +448,13 @@ class TasksWidget(QWidget):
         self.setFont(font)
 
     def closeEvent(self, event):
+        self._cancel_advice()
+        self._precompute_timer.stop()
+        if self._precompute_worker:
+            self._precompute_worker.cancel()
         # при закрытии, если активна задача — завершим текущую сессию и сохраним
         if self.active_task_id:
-            task = next((t for t in self.tasks if t.id == self.active_task_id), None)
+            task = self.store.get(self.active_task_id)
             if task:
-                for s in reversed(task.sessions):
-                    if s.end is None:
-                        s.end = datetime.now()
-                        break
-                save_tasks(self.tasks)
+                self.store.close_session(task)
         event.accept()
@@ -0,0 +1,134 @@
+# app/test_models.py
+"""Проверки моделей задач (без Qt).
+
+Запуск из корня проекта: python -m app.test_models (или python -m pytest app/test_models.py)
+"""
+import math
+from datetime import date, datetime, timedelta
+from app.models import ColumnSession, Session, SessionColumn, Task, session_pairs
+from app.report_data import daily_spent
+
+START = datetime(2025, 3, 3, 9, 0, 0)
+
+
+def loaded_task(*sessions, columns=False):
+    """Задача, как после чтения с диска: агрегаты ещё не построены."""
+    data = {
+        "id": "t",
+        "title": "T",
+        "sessions": [
+            {"start": a.isoformat(), "end": b.isoformat() if b else None}
+            for a, b in sessions
+        ],
+    }
+    return Task.from_dict(data, columns=columns)
+
+
+def test_close_on_freshly_loaded_task_counts_once():
+    for columns in (False, True):
+        task = loaded_task((START, None), columns=columns)
+        task.close_session(START + timedelta(minutes=5))
+        assert task.aggregates.total == 5 * 60
+        assert task.aggregates.open == []
+
+
+def test_open_on_freshly_loaded_task_is_single_open_entry():
+    for columns in (False, True):
+        task = loaded_task((START, START + timedelta(minutes=10)), columns=columns)
+        task.open_session(START + timedelta(hours=1))
+        assert len(task.aggregates.open) == 1
+        task.close_session(START + timedelta(hours=1, minutes=20))
+        assert task.aggregates.open == []
+        assert task.aggregates.total == 30 * 60
+        assert task.aggregates.by_day[START.date()] == 30 * 60
+
+
+def test_deferred_sessions_then_open_close():
+    task = Task("t", "T")
+    task.defer_sessions(lambda: [])
+    task.open_session(START)
+    task.close_session(START + timedelta(minutes=7))
+    assert task.aggregates.total == 7 * 60 and task.aggregates.open == []
+
+
+def epoch(moment):
+    return moment.timestamp()
+
+
+def test_column_pairs_round_trip_keeps_open_end_as_nan():
+    a = START + timedelta(microseconds=250_000)
+    pairs = [
+        [epoch(a), epoch(a + timedelta(hours=1))],
+        [epoch(START + timedelta(hours=2)), None],
+    ]
+    column = SessionColumn.from_pairs(pairs)
+    assert len(column) == 2
+    assert math.isnan(column.ends[1])
+    assert column.to_pairs() == pairs
+    assert session_pairs(column) == pairs
+    assert column[0].start == a and column[1].end is None
+    # пары из списка Session совпадают с парами столбцов
+    assert session_pairs(list(column)) == pairs
+
+
+def test_column_between_and_open_rows():
+    column = SessionColumn.from_sessions(
+        [
+            Session(START, START + timedelta(hours=1)),
+            Session(START + timedelta(days=1), START + timedelta(days=1, hours=1)),
+            Session(START + timedelta(days=2), None),
+        ]
+    )
+    now = START + timedelta(days=2, hours=3)
+    picked = column.between(START + timedelta(hours=12), START + timedelta(days=3), now)
+    assert isinstance(picked, SessionColumn)
+    assert [s.start for s in picked] == [
+        START + timedelta(days=1),
+        START + timedelta(days=2),
+    ]
+    assert picked[1].end is None
+    # открытая сессия пересекает интервал, пока идёт (до now)
+    assert len(column.between(now - timedelta(minutes=1), now, now)) == 1
+    assert column.open_rows() == {2} and column.open_rows(3) == set()
+    column[2].end = now
+    assert column.open_rows() == set() and column.ends[2] == epoch(now)
+
+
+def test_column_session_equality_and_hash():
+    column = SessionColumn.from_sessions([Session(START, None), Session(START, None)])
+    first, again = column[0], column[-2]
+    assert isinstance(first, ColumnSession)
+    assert first == again and hash(first) == hash(again)
+    assert first != column[1]
+    assert first != SessionColumn.from_sessions([Session(START, None)])[0]
+    assert len({first, again, column[1]}) == 2
+    # агрегаты находят открытую сессию среди новых представлений
+    task = Task("t", "T", sessions=column)
+    task.close_session(START + timedelta(minutes=3))
+    assert len(task.aggregates.open) == 1
+
+
+def test_daily_spent_splits_at_midnight_for_both_stores():
+    sessions = [
+        Session(START, START + timedelta(hours=2)),
+        # через полночь: 1 час в первый день, 2 — во второй
+        Session(datetime(2025, 3, 3, 23), datetime(2025, 3, 4, 2)),
+        Session(datetime(2025, 3, 5, 10), None),
+    ]
+    now = datetime(2025, 3, 5, 10, 30)
+    for store in (sessions, SessionColumn.from_sessions(sessions)):
+        days, spent = daily_spent(store, date(2025, 3, 2), date(2025, 3, 5), now)
+        assert [str(d) for d in days] == [
+            "2025-03-02",
+            "2025-03-03",
+            "2025-03-04",
+            "2025-03-05",
+        ]
+        assert list(spent) == [0, 3 * 3600, 2 * 3600, 30 * 60], type(store)
+
+
+if __name__ == "__main__":
+    tests = [f for name, f in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,232 @@
+# app/test_pomodoro.py
+"""Проверки PomodoroEngine без Qt на подменённых часах.
+
+Запуск из корня проекта: python -m app.test_pomodoro (или python -m pytest app/test_pomodoro.py)
+"""
+from datetime import datetime, timedelta
+from app.pomodoro import (
+    BREAK,
+    LONG_BREAK,
+    PHASE,
+    SESSION_CLOSE,
+    SESSION_OPEN,
+    STOPPED,
+    WORK,
+    PomodoroEngine,
+)
+
+START = datetime(2025, 3, 3, 9, 0, 0)
+
+
+class FakeClock:
+    def __init__(self):
+        self.mono = 1000.0
+        self.wall = START.timestamp()
+
+    def monotonic(self):
+        return self.mono
+
+    def time(self):
+        return self.wall
+
+    def advance(self, seconds, suspended=False):
+        """Сдвигает часы; при suspended монотонные стоят (как во сне на Linux)."""
+        self.wall += seconds
+        if not suspended:
+            self.mono += seconds
+
+
+def make_engine(clock, **kwargs):
+    params = dict(work=25 * 60, short_break=5 * 60, long_break=15 * 60)
+    params.update(kwargs)
+    engine = PomodoroEngine(clock=clock, **params)
+    sessions = []  # [start, end] рабочих сессий
+
+    def on_event(ev):
+        if ev.kind == SESSION_OPEN:
+            sessions.append([ev.at, None])
+        elif ev.kind == SESSION_CLOSE:
+            sessions[-1][1] = ev.at
+
+    engine.subscribe(on_event)
+    return engine, sessions
+
+
+def test_work_then_break_at_exact_boundary():
+    clock = FakeClock()
+    engine, sessions = make_engine(clock)
+    engine.start()
+    assert engine.phase == WORK and sessions == [[START, None]]
+
+    clock.advance(25 * 60 - 1)
+    assert engine.poll() == []
+    clock.advance(1)
+    kinds = [ev.kind for ev in engine.poll()]
+    assert kinds == [SESSION_CLOSE, PHASE]
+    assert engine.phase == BREAK
+    assert sessions == [[START, START + timedelta(minutes=25)]]
+
+    clock.advance(5 * 60)
+    engine.poll()
+    assert engine.phase == WORK
+    assert sessions[-1] == [START + timedelta(minutes=30), None]
+
+
+def test_long_break_every_n_cycles():
+    clock = FakeClock()
+    engine, _ = make_engine(clock, cycles_before_long=2)
+    engine.start()
+    phases = []
+    for _ in range(8):
+        clock.advance(engine.seconds_to_deadline())
+        phases += [ev.phase for ev in engine.poll() if ev.kind == PHASE]
+    assert phases == [BREAK, WORK, LONG_BREAK, WORK, BREAK, WORK, LONG_BREAK, WORK]
+
+
+def test_late_poll_uses_real_boundary_times():
+    clock = FakeClock()
+    engine, sessions = make_engine(clock, work=60, short_break=30, sleep_gap=120)
+    engine.start()
+    # цикл событий был занят: опрос на 40 с позже границы (пройдены 2 фазы)
+    clock.advance(60 + 40)
+    engine.poll()
+    assert engine.phase == WORK
+    assert sessions == [
+        [START, START + timedelta(seconds=60)],
+        [START + timedelta(seconds=90), None],
+    ]
+
+
+def test_days_of_cycles_simulated_quickly():
+    clock = FakeClock()
+    engine, sessions = make_engine(clock)
+    engine.start()
+    # 13 суток, опрос раз в минуту (как обновление экрана)
+    days = 13
+    for _ in range(days * 24 * 60):
+        clock.advance(60)
+        engine.poll()
+    engine.stop()
+
+    # цикл: 4 помидора по 25 мин + 3 коротких и 1 длинный перерыв = 130 мин
+    full_cycles, rest = divmod(days * 24 * 60, 130)
+    assert rest == 0
+    # последняя сессия открылась ровно в конце и закрыта stop() с нулевой длиной
+    assert len(sessions) == full_cycles * 4 + 1
+    work = sum((end - start).total_seconds() for start, end in sessions)
+    assert work == full_cycles * 4 * 25 * 60
+    assert all(end is not None for _, end in sessions)
+
+
+def test_suspend_closes_session_at_sleep_start():
+    clock = FakeClock()
+    engine, sessions = make_engine(clock)
+    engine.start()
+    clock.advance(10 * 60)
+    engine.poll()
+    clock.advance(8 * 3600, suspended=True)  # ночь во сне: монотонные стоят
+    events = engine.poll()
+    assert [ev.kind for ev in events] == [SESSION_CLOSE, STOPPED]
+    assert not engine.running
+    assert sessions == [[START, START + timedelta(minutes=10)]]
+
+
+def test_missed_boundary_counts_only_until_phase_end():
+    clock = FakeClock()
+    engine, sessions = make_engine(clock)
+    engine.start()
+    clock.advance(10 * 60)
+    engine.poll()
+    # часы, считающие сон: монотонные ушли вперёд на всю ночь
+    clock.advance(8 * 3600)
+    engine.poll()
+    assert not engine.running
+    assert sessions == [[START, START + timedelta(minutes=25)]]
+
+
+def test_sleep_during_break_opens_nothing():
+    clock = FakeClock()
+    engine, sessions = make_engine(clock)
+    engine.start()
+    clock.advance(26 * 60)
+    engine.poll()
+    assert engine.is_break
+    clock.advance(3600, suspended=True)
+    assert [ev.kind for ev in engine.poll()] == [STOPPED]
+    assert len(sessions) == 1
+
+
+def test_stop_during_break_does_not_close_again():
+    clock = FakeClock()
+    engine, sessions = make_engine(clock)
+    engine.start()
+    clock.advance(26 * 60)
+    engine.poll()
+    assert [ev.kind for ev in engine.stop()] == [STOPPED]
+    assert sessions[0][1] == START + timedelta(minutes=25)
+
+
+def test_stopwatch_mode_has_no_phases():
+    clock = FakeClock()
+    engine, sessions = make_engine(clock, pomodoro=False)
+    engine.start()
+    clock.advance(5 * 3600)
+    assert engine.poll() == []
+    assert engine.seconds_to_deadline() is None
+    assert engine.elapsed() == 5 * 3600
+    engine.stop()
+    assert sessions == [[START, START + timedelta(hours=5)]]
+
+
+def test_zero_durations_do_not_hang():
+    clock = FakeClock()
+    engine, _ = make_engine(
+        clock, work=0, short_break=0, long_break=0, cycles_before_long=0
+    )
+    engine.start()
+    clock.advance(50)
+    engine.poll()
+    assert engine.running
+
+
+def test_stopwatch_suspend_with_stopped_monotonic_clock():
+    clock = FakeClock()
+    engine, sessions = make_engine(clock, pomodoro=False)
+    engine.start()
+    clock.advance(40 * 60)
+    engine.poll()
+    clock.advance(3 * 3600, suspended=True)
+    assert [ev.kind for ev in engine.poll()] == [SESSION_CLOSE, STOPPED]
+    assert sessions == [[START, START + timedelta(minutes=40)]]
+
+
+def test_short_stall_is_not_sleep():
+    clock = FakeClock()
+    engine, sessions = make_engine(clock)
+    engine.start()
+    clock.advance(10 * 60)
+    engine.poll()
+    # монотонные стояли минуту (меньше SLEEP_GAP)
+    clock.advance(60, suspended=True)
+    assert engine.poll() == [] and engine.running
+    # опрос опоздал на минуту после границы фазы — обычная смена фазы
+    clock.advance(15 * 60 + 60)
+    kinds = [ev.kind for ev in engine.poll()]
+    assert kinds == [SESSION_CLOSE, PHASE] and engine.is_break
+    assert sessions == [[START, START + timedelta(minutes=26)]]
+
+
+def test_wall_clock_set_back_is_not_sleep():
+    clock = FakeClock()
+    engine, _ = make_engine(clock)
+    engine.start()
+    clock.advance(5 * 60)
+    clock.wall -= 3600  # системные часы перевели назад
+    assert engine.poll() == [] and engine.running
+
+
+if __name__ == "__main__":
+    tests = [f for name, f in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,33 @@
+# app/test_repository.py
+"""Проверки TaskRepository (без Qt).
+
+Запуск из корня проекта: python -m app.test_repository (или python -m pytest app/test_repository.py)
+"""
+from app.models import Task
+from app.repository import TaskRepository
+
+
+def test_reset_forgets_rows_of_removed_tasks():
+    repo = TaskRepository([Task("a", "A"), Task("b", "B")])
+    c2 = Task("c", "C")
+    repo.reset([c2])
+    assert repo.row_of("a") == -1
+    assert repo.row_of("b") == -1
+    assert repo.row_of("c") == 0 and repo.at(0) is c2
+    # замена и удаление по исчезнувшему id не трогают чужую задачу
+    assert repo.replace(Task("a", "A2")) == -1
+    assert repo.remove("a") == -1
+    assert repo.tasks == [c2]
+
+
+def test_remove_reindexes_following_rows():
+    repo = TaskRepository([Task("a", "A"), Task("b", "B"), Task("c", "C")])
+    assert repo.remove("a") == 0
+    assert repo.row_of("b") == 0 and repo.row_of("c") == 1
+
+
+if __name__ == "__main__":
+    tests = [f for name, f in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,209 @@
+# app/test_storage.py
+"""Проверки хранилищ: журнал сессий, свёртка, резервные копии, SQLite (без Qt).
+
+Запуск из корня проекта: python -m app.test_storage (или python -m pytest app/test_storage.py)
+"""
+import inspect
+import os
+import pathlib
+import tempfile
+import time
+from datetime import datetime, timedelta
+from app.models import SessionColumn, Task
+from app.sqlite_storage import SqliteStorage, migrate_json_to_sqlite
+from app.storage import DebouncedWriter, JsonStorage
+
+START = datetime(2025, 3, 3, 9, 0, 0)
+
+
+def hours(task):
+    """Сессии задачи как пары часов (start, end) от START."""
+    return [
+        (
+            int((s.start - START) / timedelta(hours=1)),
+            int((s.end - START) / timedelta(hours=1)) if s.end else None,
+        )
+        for s in task.sessions
+    ]
+
+
+def make_storage(tmp, **kwargs):
+    return JsonStorage(
+        os.path.join(tmp, "tasks.json"),
+        os.path.join(tmp, "tasks.journal.jsonl"),
+        **kwargs,
+    )
+
+
+def track(storage, task, start_h, end_h):
+    """Открывает и закрывает сессию задачи с записью в журнал."""
+    s = task.open_session(START + timedelta(hours=start_h))
+    storage.log_session_open(task, s)
+    s = task.close_session(START + timedelta(hours=end_h))
+    storage.log_session_close(task, s)
+
+
+def test_replaying_journal_already_in_snapshot_adds_nothing():
+    for kwargs in ({}, {"compact": True}):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = make_storage(tmp, **kwargs)
+            task = Task("t", "T")
+            storage.save_tasks([task])
+            track(storage, task, 9, 10)
+            track(storage, task, 11, 12)
+            # сбой между записью снимка и удалением журнала: журнал уже в снимке
+            storage._write_snapshot(
+                [task.to_dict()]
+                if not kwargs
+                else {"v": 2, "tasks": [task.to_compact()]}
+            )
+            loaded = make_storage(tmp, **kwargs).load_tasks()[0]
+            assert hours(loaded) == [(9, 10), (11, 12)], kwargs
+
+
+def test_save_after_interrupted_compaction_drops_both_journals():
+    for kwargs in ({}, {"compact": True}, {"lazy": True}):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = make_storage(tmp, **kwargs)
+            task = Task("t", "T")
+            storage.save_tasks([task])
+            track(storage, task, 9, 10)
+            # свёртку убили при выходе: журнал переименован, но не свёрнут
+            os.replace(storage.journal_path, storage._compacting_path)
+            track(storage, task, 11, 12)
+            track(storage, task, 13, 14)
+
+            storage = make_storage(tmp, **kwargs)
+            task = storage.load_tasks()[0]
+            assert hours(task) == [(9, 10), (11, 12), (13, 14)], kwargs
+            storage.save_tasks([task])
+            assert not os.path.exists(storage.journal_path), kwargs
+            assert not os.path.exists(storage._compacting_path), kwargs
+
+            loaded = make_storage(tmp, **kwargs).load_tasks()[0]
+            assert hours(loaded) == [(9, 10), (11, 12), (13, 14)], kwargs
+
+
+def test_compaction_after_interrupted_compaction_keeps_all_events():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = make_storage(tmp)
+        task = Task("t", "T")
+        storage.save_tasks([task])
+        track(storage, task, 9, 10)
+        os.replace(storage.journal_path, storage._compacting_path)
+        # прерванная запись: последняя строка .compacting без перевода строки
+        with open(storage._compacting_path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            f.truncate()
+        track(storage, task, 11, 12)
+        storage.compact_journal()
+        assert not os.path.exists(storage.journal_path)
+        assert not os.path.exists(storage._compacting_path)
+        loaded = make_storage(tmp).load_tasks()[0]
+        assert hours(loaded) == [(9, 10), (11, 12)]
+
+
+def test_sqlite_round_trip(tmp_path):
+    for kwargs in ({}, {"lazy": True}, {"columns": True}):
+        path = str(tmp_path / f"{'-'.join(kwargs) or 'tasks'}.db")
+        storage = SqliteStorage(path, migrate_from=None)
+        task = Task("t", "T", description="описание", time_allocated=90)
+        storage.save_tasks([task, Task("u", "U")])
+        track(storage, task, 9, 10)
+        s = task.open_session(START + timedelta(hours=11))
+        storage.log_session_open(task, s)
+        storage.close()
+
+        storage = SqliteStorage(path, migrate_from=None, **kwargs)
+        loaded = storage.load_tasks()
+        assert [t.id for t in loaded] == ["t", "u"], kwargs
+        assert loaded[0].description == "описание" and loaded[0].time_allocated == 90
+        assert hours(loaded[0]) == [(9, 10), (11, None)], kwargs
+        assert hours(loaded[1]) == [], kwargs
+        if kwargs.get("columns"):
+            assert isinstance(loaded[0].sessions, SessionColumn)
+        storage.close()
+
+
+def test_migrate_legacy_json_with_journal(tmp_path):
+    json_storage = make_storage(str(tmp_path))
+    task = Task("t", "T")
+    track(json_storage, task, 8, 9)
+    json_storage.save_tasks([task, Task("u", "U")])
+    # события после последнего снимка есть только в журнале
+    track(json_storage, task, 10, 11)
+
+    storage = migrate_json_to_sqlite(json_storage.path, str(tmp_path / "tasks.db"))
+    storage.close()
+    storage = SqliteStorage(str(tmp_path / "tasks.db"), migrate_from=None)
+    loaded = storage.load_tasks()
+    assert [t.id for t in loaded] == ["t", "u"]
+    assert hours(loaded[0]) == [(8, 9), (10, 11)]
+    # исходный файл остаётся резервной копией
+    assert os.path.exists(json_storage.path)
+    storage.close()
+
+
+def test_sqlite_close_matches_session_by_start(tmp_path):
+    storage = SqliteStorage(str(tmp_path / "tasks.db"), migrate_from=None)
+    task = Task("t", "T")
+    storage.save_tasks([task])
+    # две сессии, начатые в одну секунду, различаются микросекундами
+    first = START + timedelta(microseconds=100_000)
+    second = START + timedelta(microseconds=700_000)
+    for start, end in ((first, START + timedelta(seconds=1)), (second, None)):
+        s = task.open_session(start)
+        storage.log_session_open(task, s)
+        if end:
+            storage.log_session_close(task, task.close_session(end))
+    loaded = storage.load_tasks()[0]
+    assert [(s.start, s.end) for s in loaded.sessions] == [
+        (first, START + timedelta(seconds=1)),
+        (second, None),
+    ]
+    storage.close()
+
+
+def test_corrupt_snapshot_falls_back_to_backup(tmp_path):
+    storage = make_storage(str(tmp_path))
+    storage.save_tasks([Task("t", "Первая")])
+    storage.save_tasks([Task("t", "Вторая")])
+    with open(storage.path, "w", encoding="utf-8") as f:
+        f.write('[{"id": ')
+    loaded = make_storage(str(tmp_path)).load_tasks()
+    assert [t.title for t in loaded] == ["Первая"]
+    assert os.path.exists(storage.path + ".corrupt")
+    # следующая запись не кладёт битый файл на место резервной копии
+    storage.save_tasks([Task("t", "Третья")])
+    backup = JsonStorage(storage.path + ".bak", storage.journal_path)
+    assert [t.title for t in backup.load_tasks()] == ["Первая"]
+
+
+def test_debounced_writer_coalesces_and_flushes(tmp_path):
+    writes = []
+    writer = DebouncedWriter(delay=0.05)
+    for i in range(10):
+        writer.schedule("tasks", lambda i=i: writes.append(i))
+    assert writes == []
+    time.sleep(0.3)
+    assert writes == [9]
+
+    writer.schedule("tasks", lambda: writes.append("flush"))
+    writer.schedule("settings", lambda: writes.append("settings"))
+    assert writer.busy("tasks")
+    writer.flush()
+    assert writes == [9, "flush", "settings"] and not writer.busy("tasks")
+    time.sleep(0.1)
+    assert writes == [9, "flush", "settings"]
+
+
+if __name__ == "__main__":
+    tests = [f for name, f in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        if "tmp_path" in inspect.signature(test).parameters:
+            # как фикстура tmp_path в pytest
+            with tempfile.TemporaryDirectory() as tmp:
+                test(pathlib.Path(tmp))
+        else:
+            test()
+        print(f"✅ {test.__name__}")
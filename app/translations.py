@@ -69,6 +69,18 @@ class Translation:
                 "Language": "Язык",
                 "Use dark theme": "Использовать тёмную тему",
                 "Font size": "Размер шрифта",
+                "Fast AI on CPU (int8)": "Быстрый ИИ на CPU (int8)",
+                "AI advice source": "Источник советов ИИ",
+                "local_first": "Сначала локальная модель",
+                "remote_first": "Сначала Hugging Face API",
+                "static_only": "Только готовые советы",
+                "local": "Локальная модель",
+                "remote": "Hugging Face API",
+                "available": "доступен",
+                "paused after errors": "пауза после ошибок",
+                "no token": "нет токена",
+                "no model": "нет модели",
+                "Active": "Сейчас используется",
             },
             "English": {
                 # навигация / основное
@@ -132,6 +144,18 @@ class Translation:
                 "Language": "Language",
                 "Use dark theme": "Use dark theme",
                 "Font size": "Font size",
+                "Fast AI on CPU (int8)": "Fast AI on CPU (int8)",
+                "AI advice source": "AI advice source",
+                "local_first": "Local model first",
+                "remote_first": "Hugging Face API first",
+                "static_only": "Built-in tips only",
+                "local": "Local model",
+                "remote": "Hugging Face API",
+                "available": "available",
+                "paused after errors": "paused after errors",
+                "no token": "no token",
+                "no model": "no model",
+                "Active": "Active",
             },
         }
 
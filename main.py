@@ -1,5 +1,12 @@
 # main.py
+import time
+
+# отсчёт времени запуска — до импорта Qt и страниц приложения
+_STARTED = time.perf_counter()
+
+import importlib
 import sys
+import threading
 from PyQt5.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -9,12 +16,35 @@ from PyQt5.QtWidgets import (
     QPushButton,
     QStackedWidget,
 )
+from PyQt5.QtCore import QEvent, QTimer
 import qdarkstyle
 from app.tasks_widget import TasksWidget
 from app.reports_widget import ReportsWidget
-from app.settings_widget import SettingsWidget
-from app.storage import load_settings
+from app.settings_widget import SettingsWidget, apply_app_font
+from app.storage import flush_pending_writes, load_settings
+from app.task_store import TaskStore
 from app.translations import tr
+from app.ai_assistant import (
+    engine as ai_engine,
+    local_model_installed,
+    remote_configured,
+    router as ai_router,
+)
+
+# тяжёлые модули, которые страницам нужны не сразу (см. preload_heavy_modules)
+HEAVY_MODULES = (
+    "numpy",
+    "pandas",
+    "matplotlib.figure",
+    "matplotlib.backends.backend_qt5agg",
+)
+# модули источников советов ИИ: подгружаются заранее, только если источник
+# включён и им есть чем работать (см. modules_to_preload)
+LOCAL_AI_MODULES = ("torch", "transformers")
+REMOTE_AI_MODULES = ("huggingface_hub",)
+# страницы отчётов и настроек строятся при первом переходе на них
+# или в простое главного цикла через столько мс после показа окна
+PAGE_PREBUILD_DELAY_MS = 500
 
 
 class NavButton(QPushButton):
@@ -77,15 +107,29 @@ class MainWindow(QMainWindow):
         nav_bar.addWidget(self.btn_settings)
         nav_bar.addStretch()
 
+        # одно хранилище задач на все страницы: задачи читаются с диска один раз
+        self.store = TaskStore(parent=self)
+
         self.stack = QStackedWidget()
         # передаём settings в страницы, чтобы они могли читать font_size и т.д.
-        self.tasks_page = TasksWidget(settings=self.settings)
-        self.reports_page = ReportsWidget(settings=self.settings)
-        self.settings_page = SettingsWidget(main_window=self, settings=self.settings)
+        # Сразу строится только страница задач; остальные — лениво (см. page)
+        self.tasks_page = TasksWidget(settings=self.settings, store=self.store)
+        self.reports_page = None
+        self.settings_page = None
+        self._page_factories = {
+            1: (
+                "reports_page",
+                lambda: ReportsWidget(settings=self.settings, store=self.store),
+            ),
+            2: (
+                "settings_page",
+                lambda: SettingsWidget(main_window=self, settings=self.settings),
+            ),
+        }
 
         self.stack.addWidget(self.tasks_page)
-        self.stack.addWidget(self.reports_page)
-        self.stack.addWidget(self.settings_page)
+        for _ in self._page_factories:
+            self.stack.addWidget(QWidget())  # заглушка до первого обращения
 
         self.main_layout.addLayout(nav_bar)
         self.main_layout.addWidget(self.stack)
@@ -98,19 +142,65 @@ class MainWindow(QMainWindow):
         self.switch_page(0)
         self.retranslateUi()
 
+    def page(self, index):
+        """Страница стека; при первом обращении создаётся вместо заглушки."""
+        if index not in self._page_factories:
+            return self.stack.widget(index)
+        attr, factory = self._page_factories[index]
+        page = getattr(self, attr)
+        if page is None:
+            page = factory()
+            placeholder = self.stack.widget(index)
+            current = self.stack.currentIndex()
+            self.stack.insertWidget(index, page)
+            self.stack.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.stack.setCurrentIndex(current)
+            setattr(self, attr, page)
+        return page
+
+    def prebuild_pages(self):
+        """Строит ещё не созданные страницы по одной за проход главного цикла."""
+        for index in self._page_factories:
+            attr, _ = self._page_factories[index]
+            if getattr(self, attr) is None:
+                self.page(index)
+                QTimer.singleShot(0, self.prebuild_pages)
+                return
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not getattr(self, "_prebuild_scheduled", False):
+            self._prebuild_scheduled = True
+            QTimer.singleShot(PAGE_PREBUILD_DELAY_MS, self.prebuild_pages)
+
     def switch_page(self, index):
+        self.page(index)
         self.stack.setCurrentIndex(index)
         self.btn_tasks.setChecked(index == 0)
         self.btn_reports.setChecked(index == 1)
         self.btn_settings.setChecked(index == 2)
 
+        # файл мог поменяться извне (например, синхронизация) — проверяем только mtime
+        self.store.reload_if_changed()
         if index == 1:
             self.reports_page.refresh_data()
 
+    def changeEvent(self, event):
+        # при возврате в окно проверяем, не поменялись ли задачи на диске извне
+        if event.type() == QEvent.ActivationChange and self.isActiveWindow():
+            self.store.reload_if_changed()
+        # свёрнутое окно не перерисовывает таймер; смена фаз идёт своим таймером
+        if event.type() == QEvent.WindowStateChange:
+            self.tasks_page.update_display_timer()
+        super().changeEvent(event)
+
     def closeEvent(self, event):
         # перед закрытием делегируем TasksWidget сохранение
         if hasattr(self, "tasks_page") and self.tasks_page:
             self.tasks_page.closeEvent(event)
+        # отложенные сохранения задач и настроек — на диск до выхода
+        flush_pending_writes()
         event.accept()
 
     def retranslateUi(self):
@@ -133,9 +223,7 @@ class MainWindow(QMainWindow):
         if hasattr(self.tasks_page, "retranslateUi"):
             self.tasks_page.retranslateUi()
         if hasattr(self.reports_page, "retranslateUi"):
-            # необходимо также обновить список задач в графиках
             self.reports_page.retranslateUi()
-            self.reports_page.populate_task_list()
         if hasattr(self.settings_page, "retranslateUi"):
             self.settings_page.retranslateUi()
 
@@ -178,6 +266,38 @@ class MainWindow(QMainWindow):
             pass
 
 
+def modules_to_preload(lang):
+    """HEAVY_MODULES плюс модули ИИ для источников, которые реально будут работать.
+
+    torch и transformers занимают сотни МБ и держат GIL при импорте — без
+    локальной модели на диске или с static_only их не трогаем.
+    """
+    names = list(HEAVY_MODULES)
+    backends = ai_router.backends()
+    if "local" in backends and local_model_installed(lang):
+        names += LOCAL_AI_MODULES
+    if "remote" in backends and remote_configured():
+        names += REMOTE_AI_MODULES
+    return names
+
+
+def preload_heavy_modules(names=HEAVY_MODULES):
+    """Импортирует тяжёлые модули в фоновом потоке, пока пользователь смотрит на окно."""
+
+    def run():
+        started = time.perf_counter()
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"⚠️ Не удалось загрузить модуль {name}: {e}")
+        print(f"📦 Фоновые модули загружены за {time.perf_counter() - started:.2f} с")
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
 def main():
     app = QApplication(sys.argv)
     # Загружаем настройки
@@ -192,10 +312,33 @@ def main():
             app.setStyleSheet("")
     else:
         app.setStyleSheet("")
-    # если в настройках был размер шрифта — применим
-    # но SettingsWidget также применит при инициализации
+    # размер шрифта применяем до создания окна: страница настроек строится лениво,
+    # а созданные позже страницы берут шрифт приложения сами
+    apply_app_font(int(settings.get("font_size", 12)))
     w = MainWindow()
     w.show()
+    print(
+        f"⏱️ Окно показано через {time.perf_counter() - _STARTED:.2f} с после запуска"
+    )
+
+    # локальную модель ИИ (если включено) грузим в фоне уже после показа окна
+    idle_min = settings.get("ai_idle_unload_min")
+    ai_engine.configure(
+        memory_budget_mb=settings.get("ai_memory_budget_mb"),
+        idle_timeout=idle_min * 60 if idle_min else None,
+        cpu_mode=settings.get("ai_cpu_mode"),
+        threads=settings.get("ai_threads"),
+    )
+    ai_router.configure(
+        order=settings.get("ai_backend_order"),
+        remote_timeout=settings.get("ai_remote_timeout"),
+        local_max_time=settings.get("ai_local_max_time"),
+    )
+    if settings.get("ai_preload", False):
+        ai_engine.preload(["en" if settings.get("language") == "English" else "ru"])
+    if settings.get("preload_modules", True):
+        lang = "en" if settings.get("language") == "English" else "ru"
+        preload_heavy_modules(modules_to_preload(lang))
     sys.exit(app.exec_())
 
 